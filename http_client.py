@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+HTTP layer for the scraper: pooled keep-alive GETs, an on-disk response
+cache with conditional revalidation, streaming gzip/deflate decoding,
+robots.txt handling, and retries with a per-host circuit breaker.
+
+Module-level defaults (``_HTTP_POOL``, ``_ROBOTS_CACHE``, ``_RETRY_POLICY``,
+``_CIRCUIT_BREAKER``) are shared by every caller that does not pass its own.
+"""
+
+import os
+import json
+import time
+import zlib
+import random
+import hashlib
+import threading
+import contextlib
+import io
+import ssl
+import http.client
+import urllib.error
+import urllib.request
+import urllib.parse
+import urllib.robotparser
+import email.utils
+from datetime import datetime, timezone
+
+
+def _host_key(url: str) -> str:
+    """Scheme + host[:port] of a URL, used to group requests per origin."""
+    parsed = urllib.parse.urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+# ---------------------------------------------------------------------------
+# Connection pooling
+# ---------------------------------------------------------------------------
+
+USER_AGENT = "AgentCampDocBot/1.0 (+https://github.com/davidop/agentcamp-madrid-2026)"
+
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# Idle keep-alive connections kept per host, and seconds before an idle one is dropped
+DEFAULT_POOL_SIZE = 4
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+# Failures that mean a kept-alive connection was closed by the server while idle
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class PooledResponse:
+    """
+    An HTTP response that hands its connection back to the pool when done.
+
+    The connection is reused only if the body was read to the end and the
+    server did not ask to close it; otherwise it is closed. Use as a context
+    manager, or call ``close()``.
+    """
+
+    def __init__(self, url: str, response, pool=None, key=None, conn=None):
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._response = response
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+
+    def read(self, amt: int = None) -> bytes:
+        return self._response.read(amt)
+
+    def iter_chunks(self, size: int = 64 * 1024):
+        """Yield the body in chunks of at most ``size`` bytes."""
+        while True:
+            chunk = self._response.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            self._response.close()
+            return
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._key, conn)
+        else:
+            self._response.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HTTPConnectionPool:
+    """
+    Thread-safe keep-alive connection pool for GET requests.
+
+    Idle connections are kept per (scheme, host, port), at most ``pool_size``
+    per host, and discarded once idle for ``idle_timeout`` seconds. A thread
+    checks a connection out for the duration of one request/response, so
+    connections are never shared concurrently. A reused connection that turns
+    out to have been closed by the server is replaced and the request retried
+    once. Redirects are followed, and responses with status >= 400 raise
+    ``urllib.error.HTTPError`` like ``urlopen`` does. When a proxy is
+    configured for the scheme, requests fall back to ``urlopen``.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 timeout: float = 10):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.created = 0
+        self.reused = 0
+        self._idle = {}  # key -> [(conn, released_at)], most recent last
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _acquire(self, key: tuple, timeout: float) -> tuple:
+        """Check out an idle connection for ``key`` or open a new one; returns (conn, reused)."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout:
+                    self.reused += 1
+                    break
+                conn.close()
+            else:
+                conn = None
+                self.created += 1
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def release(self, key: tuple, conn) -> None:
+        """Return a connection whose response was fully read to the idle list."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [(c, t) for c, t in self._idle.get(key, []) if now - t <= self.idle_timeout]
+            idle.append((conn, now))
+            while len(idle) > self.pool_size:
+                idle.pop(0)[0].close()
+            self._idle[key] = idle
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+    def request(self, url: str, headers: dict = None, timeout: float = None, max_redirects: int = 5) -> PooledResponse:
+        """
+        Send a GET request and return the response (caller must close it).
+
+        Raises:
+            urllib.error.HTTPError: for responses with status >= 400.
+            urllib.error.URLError: for unsupported schemes or too many redirects.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", USER_AGENT)
+
+        for _ in range(max_redirects + 1):
+            parsed = urllib.parse.urlsplit(url)
+            scheme = parsed.scheme.lower()
+            if scheme not in ("http", "https"):
+                raise urllib.error.URLError(f"unsupported URL scheme: {url}")
+            if urllib.request.getproxies().get(scheme) and not urllib.request.proxy_bypass(parsed.hostname or ""):
+                req = urllib.request.Request(url, headers=headers)
+                response = urllib.request.urlopen(req, timeout=timeout)
+                return PooledResponse(response.geturl(), response)
+
+            key = (scheme, parsed.hostname, parsed.port or (443 if scheme == "https" else 80))
+            target = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+            for attempt in (0, 1):
+                conn, reused = self._acquire(key, timeout)
+                try:
+                    conn.request("GET", target, headers=headers)
+                    response = conn.getresponse()
+                    break
+                except _STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if not reused or attempt:
+                        raise
+                except Exception:
+                    conn.close()
+                    raise
+
+            pooled = PooledResponse(url, response, self, key, conn)
+            location = response.getheader("Location")
+            if response.status in _REDIRECT_STATUSES and location:
+                with pooled:
+                    pooled.read()
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if response.status >= 400:
+                with pooled:
+                    body = pooled.read()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+            return pooled
+
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+
+_HTTP_POOL = HTTPConnectionPool()
+
+
+# ---------------------------------------------------------------------------
+# Response cache (ETag / Last-Modified revalidation)
+# ---------------------------------------------------------------------------
+
+class HTTPCache:
+    """
+    Persistent on-disk response cache with conditional revalidation.
+
+    Bodies are stored as ``<sha256(url)>.body`` files next to an ``index.json``
+    holding each URL's ``ETag``/``Last-Modified`` validators, size and last
+    use. Cached URLs are revalidated with ``If-None-Match``/``If-Modified-Since``
+    and a ``304 Not Modified`` reuses the stored body. On ``save()`` the least
+    recently used bodies are evicted until the cache fits in ``max_bytes``.
+    In ``offline`` mode nothing is fetched and only cached URLs can be served.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, offline: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(directory, self.INDEX_NAME), "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            if not isinstance(self.entries, dict):
+                self.entries = {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".body")
+
+    def lookup(self, url: str) -> dict:
+        """Return the index entry for a cached URL, or None if absent or its body is gone."""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is not None and not os.path.isfile(self._body_path(url)):
+                del self.entries[url]
+                entry = None
+        return entry
+
+    def iter_body(self, url: str, chunk_size: int = 64 * 1024):
+        """Yield a cached body in chunks."""
+        with open(self._body_path(url), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def validators(self, entry: dict) -> dict:
+        """Conditional request headers for a cached entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str, counter: str = None) -> None:
+        """Mark a URL as used now and bump one of the hits/revalidated/misses counters."""
+        with self._lock:
+            if counter:
+                setattr(self, counter, getattr(self, counter) + 1)
+            if url in self.entries:
+                self.entries[url]["used"] = time.time()
+
+    @contextlib.contextmanager
+    def writer(self, url: str, headers):
+        """
+        Yield a ``write(chunk)`` callable that streams a 200 response body into the cache.
+
+        The body and its validators are committed only if the block completes;
+        an interrupted download leaves the previous entry untouched.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._body_path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                def write(chunk: bytes) -> None:
+                    nonlocal size
+                    size += len(chunk)
+                    f.write(chunk)
+                yield write
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.entries[url] = {
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "size": size,
+                "used": time.time(),
+            }
+
+    def evict(self) -> None:
+        """Delete the least recently used bodies until the cache fits in ``max_bytes``."""
+        with self._lock:
+            ordered = sorted(self.entries.items(), key=lambda item: item[1].get("used", 0), reverse=True)
+            kept, total = {}, 0
+            for url, entry in ordered:
+                total += entry.get("size", 0)
+                if total <= self.max_bytes:
+                    kept[url] = entry
+                    continue
+                with contextlib.suppress(OSError):
+                    os.remove(self._body_path(url))
+            self.entries = kept
+
+    def save(self) -> None:
+        """Evict, then atomically write the index to disk."""
+        self.evict()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.INDEX_NAME)
+        tmp_path = f"{path}.tmp"
+        with self._lock, open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Streaming fetches
+# ---------------------------------------------------------------------------
+
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Upper bound on a decompressed response body (decompression-bomb guard)
+DEFAULT_MAX_DECODED_BYTES = 64 * 1024 * 1024
+
+
+def decode_content(chunks, encoding: str, chunk_size: int = 64 * 1024,
+                   max_bytes: int = DEFAULT_MAX_DECODED_BYTES):
+    """
+    Undo a ``Content-Encoding`` while streaming.
+
+    gzip and deflate (zlib-wrapped or raw) bodies are inflated incrementally,
+    never producing more than ``chunk_size`` bytes per step, and the stream
+    is aborted once more than ``max_bytes`` have been produced.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        yield from chunks
+        return
+    if encoding in ("gzip", "x-gzip"):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decompressor = None  # zlib header or raw deflate, decided on the first bytes
+    else:
+        raise urllib.error.URLError(f"unsupported Content-Encoding: {encoding}")
+
+    total = 0
+    for data in chunks:
+        if decompressor is None:
+            try:
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+                out = decompressor.decompress(data, chunk_size)
+            except zlib.error:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                out = decompressor.decompress(data, chunk_size)
+        else:
+            out = decompressor.decompress(data, chunk_size)
+        while True:
+            total += len(out)
+            if total > max_bytes:
+                raise urllib.error.URLError(f"decompressed body exceeds {max_bytes} bytes")
+            if out:
+                yield out
+            if not decompressor.unconsumed_tail:
+                break
+            out = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+    if decompressor is not None:
+        out = decompressor.flush()
+        if total + len(out) > max_bytes:
+            raise urllib.error.URLError(f"decompressed body exceeds {max_bytes} bytes")
+        if out:
+            yield out
+
+
+def iter_url(url: str, timeout: int = 10, pool: HTTPConnectionPool = None, cache: HTTPCache = None,
+             chunk_size: int = 64 * 1024, max_decoded_bytes: int = DEFAULT_MAX_DECODED_BYTES):
+    """
+    Stream a URL's body in chunks over a pooled keep-alive connection.
+
+    With a ``cache``, a previously fetched URL is requested conditionally and
+    its stored body replayed on ``304``; fresh ``200`` bodies are written
+    through to the cache as they are read. gzip/deflate transfer compression
+    is negotiated and undone on the fly (see ``decode_content``), so callers
+    and the cache only ever see decoded bytes. In offline mode the cache
+    alone answers. Closing the generator early closes the response and
+    discards a partially cached body.
+    """
+    entry = cache.lookup(url) if cache is not None else None
+    if cache is not None and cache.offline:
+        if entry is None:
+            raise urllib.error.URLError(f"offline and not in HTTP cache: {url}")
+        cache.touch(url, "hits")
+        yield from cache.iter_body(url, chunk_size)
+        return
+
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING}
+    if entry is not None:
+        headers.update(cache.validators(entry))
+    with (pool or _HTTP_POOL).request(url, headers=headers, timeout=timeout) as resp:
+        if cache is not None and resp.status == 304 and entry is not None:
+            resp.read()
+            not_modified = True
+        else:
+            body = decode_content(resp.iter_chunks(chunk_size), resp.headers.get("Content-Encoding"),
+                                  chunk_size, max_decoded_bytes)
+            if cache is None or resp.status != 200:
+                yield from body
+                return
+            cache.touch(url, "misses")
+            with cache.writer(url, resp.headers) as write:
+                for chunk in body:
+                    write(chunk)
+                    yield chunk
+            return
+    if not_modified:
+        cache.touch(url, "revalidated")
+        yield from cache.iter_body(url, chunk_size)
+
+
+def fetch_url(url: str, timeout: int = 10, pool: HTTPConnectionPool = None, cache: HTTPCache = None) -> str:
+    """Fetch content from a URL with a basic User-Agent header, over a pooled keep-alive connection."""
+    return b"".join(iter_url(url, timeout, pool, cache)).decode("utf-8", errors="replace")
+
+
+# ---------------------------------------------------------------------------
+# robots.txt
+# ---------------------------------------------------------------------------
+
+ROBOTS_USER_AGENT = "AgentCampDocBot"
+
+
+class RobotsCache:
+    """
+    Shared, thread-safe robots.txt cache keyed by scheme + host.
+
+    Each origin's robots.txt is downloaded at most once per ``ttl`` seconds,
+    even when many threads ask at the same time. Hosts without a robots file
+    (4xx) are cached negatively as "allow all"; unreachable hosts are allowed
+    and 5xx answers disallowed, both for the shorter ``error_ttl``.
+    ``crawl_delay``/``request_rate`` expose the politeness directives so a
+    scheduler can space out requests (see ``min_interval``). robots.txt is
+    fetched through ``pool`` (defaults to the shared module pool).
+    """
+
+    def __init__(self, ttl: float = 3600, error_ttl: float = 300, user_agent: str = ROBOTS_USER_AGENT,
+                 pool: HTTPConnectionPool = None):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.user_agent = user_agent
+        self.pool = pool
+        self.fetches = 0
+        self._entries = {}  # host key -> (expires_at, RobotFileParser)
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+    def _download(self, robots_url: str) -> tuple:
+        """Fetch and parse robots.txt; returns (parser, ttl)."""
+        rp = urllib.robotparser.RobotFileParser(robots_url)
+        try:
+            text = fetch_url(robots_url, pool=self.pool)
+        except urllib.error.HTTPError as err:
+            if err.code in (401, 403):
+                rp.disallow_all = True
+            elif err.code < 500:
+                rp.allow_all = True  # no robots file: negative cache
+            else:
+                rp.disallow_all = True
+            rp.modified()
+            return rp, (self.ttl if 400 <= err.code < 500 else self.error_ttl)
+        except Exception:
+            # If robots.txt is not accessible, allow scraping
+            rp.allow_all = True
+            rp.modified()
+            return rp, self.error_ttl
+        rp.parse(text.splitlines())
+        return rp, self.ttl
+
+    def parser(self, url: str) -> urllib.robotparser.RobotFileParser:
+        """The (possibly cached) robots.txt parser for the URL's origin."""
+        key = _host_key(url)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        with host_lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+            self.fetches += 1
+            rp, ttl = self._download(f"{key}/robots.txt")
+            self._entries[key] = (time.time() + ttl, rp)
+            return rp
+
+    def can_fetch(self, url: str) -> bool:
+        return self.parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> float:
+        """``Crawl-delay`` for our user agent on the URL's host, or None."""
+        delay = self.parser(url).crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def request_rate(self, url: str) -> tuple:
+        """``Request-rate`` as (requests, seconds), or None."""
+        rate = self.parser(url).request_rate(self.user_agent)
+        return (rate.requests, rate.seconds) if rate else None
+
+    def min_interval(self, url: str) -> float:
+        """Minimum seconds between requests to the URL's host implied by robots.txt."""
+        interval = self.crawl_delay(url) or 0.0
+        rate = self.request_rate(url)
+        if rate and rate[0]:
+            interval = max(interval, rate[1] / rate[0])
+        return interval
+
+    def sitemaps(self, url: str) -> list:
+        """``Sitemap`` URLs listed in the host's robots.txt."""
+        return self.parser(url).site_maps() or []
+
+
+_ROBOTS_CACHE = RobotsCache()
+
+
+def is_allowed_by_robots(url: str, robots: RobotsCache = None) -> bool:
+    """Check whether the given URL is allowed to be scraped according to robots.txt (cached per host)."""
+    return (robots or _ROBOTS_CACHE).can_fetch(url)
+
+
+# ---------------------------------------------------------------------------
+# Retries and circuit breaking
+# ---------------------------------------------------------------------------
+
+def _retry_after(exc: Exception) -> float:
+    """Seconds requested by an HTTP error's ``Retry-After`` header, or None."""
+    headers = getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """
+    Bounded retries with full-jitter exponential backoff for transient failures.
+
+    ``429``/``502``/``503``/``504`` answers and dropped connections are retried
+    up to ``attempts`` tries in total. The n-th retry waits a random time in
+    ``[0, min(max_delay, base_delay * 2**n)]``, or exactly what ``Retry-After``
+    asks for; a ``Retry-After`` longer than ``max_delay`` is not waited out.
+    Timeouts are not retried: a host that slow is left to the circuit breaker.
+    """
+
+    TRANSIENT_STATUSES = {429, 502, 503, 504}
+    TRANSIENT_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, http.client.RemoteDisconnected)
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_transient(self, exc: Exception) -> bool:
+        if isinstance(exc, urllib.error.HTTPError):
+            return exc.code in self.TRANSIENT_STATUSES
+        return isinstance(exc, self.TRANSIENT_ERRORS)
+
+    def delay(self, attempt: int, exc: Exception) -> float:
+        """Seconds to wait before retry number ``attempt`` (0-based) after ``exc``, or None to give up."""
+        if attempt + 1 >= self.attempts or not self.is_transient(exc):
+            return None
+        requested = _retry_after(exc)
+        if requested is not None:
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker, shared across threads.
+
+    After ``failure_threshold`` consecutive host failures (connection errors,
+    timeouts, 5xx) the host's circuit opens and requests to it fail
+    immediately for ``reset_timeout`` seconds. Then a single trial request is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}  # host key -> [consecutive failures, opened_at or None, trial in flight]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_host_failure(exc: Exception) -> bool:
+        if isinstance(exc, urllib.error.HTTPError):
+            return exc.code >= 500
+        if isinstance(exc, urllib.error.URLError):
+            # Our own URLErrors (offline miss, bad scheme, oversized body) carry a str reason
+            return isinstance(exc.reason, OSError)
+        return isinstance(exc, (OSError, http.client.HTTPException))
+
+    def allow(self, url: str) -> bool:
+        """True if a request to the URL's host may be attempted now."""
+        with self._lock:
+            state = self._hosts.get(_host_key(url))
+            if state is None or state[1] is None:
+                return True
+            if time.monotonic() - state[1] < self.reset_timeout or state[2]:
+                return False
+            state[2] = True  # half-open: this caller is the trial request
+            return True
+
+    def record(self, url: str, exc: Exception = None) -> None:
+        """Record the outcome of a request: success if ``exc`` is None."""
+        key = _host_key(url)
+        with self._lock:
+            if exc is None or not self.is_host_failure(exc):
+                self._hosts.pop(key, None)
+                return
+            state = self._hosts.setdefault(key, [0, None, False])
+            state[0] += 1
+            state[2] = False
+            if state[1] is not None or state[0] >= self.failure_threshold:
+                state[1] = time.monotonic()
+
+    def is_open(self, url: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(_host_key(url))
+            return state is not None and state[1] is not None
+
+
+_RETRY_POLICY = RetryPolicy()
+_CIRCUIT_BREAKER = CircuitBreaker()
@@ -10,9 +10,14 @@ Mermaid visualisation as shown at AgentCamp Madrid 2026.
 """
 
 import os
+import re
 import sys
 import json
+import time
 import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
@@ -23,18 +28,46 @@ from pathlib import Path
 _ROOT = Path(__file__).parent
 sys.path.insert(0, str(_ROOT))
 
-from scraper import scrape_project_files, scrape_url, extract_aspire_metadata, save_scrape_results
+from scrape_store import ScrapeStore
+from search_index import SearchIndex
+from scraper import (
+    scan_project_changes,
+    iter_project_files,
+    stream_extract,
+    MetadataCache,
+    HTTPCache,
+    HTTPConnectionPool,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    CRAWL_SCOPES,
+    DEFAULT_CRAWL_DEPTH,
+    SitemapState,
+    parse_lastmod,
+    iter_remote_results,
+    write_remote_results,
+    ResultWriter,
+    results_path,
+    DEFAULT_CHUNK_BYTES,
+    iter_file_chunks,
+    BlobStore,
+    save_scrape_results,
+)
 
 
 # ---------------------------------------------------------------------------
 # Mermaid diagram generators
 # ---------------------------------------------------------------------------
 
+def _mermaid_id(name: str) -> str:
+    """Turn a registered Aspire name (e.g. ``mcp-functionapp``) into a safe Mermaid node id."""
+    return re.sub(r"\W", "_", name)
+
+
 def build_architecture_diagram(metadata: dict) -> str:
     """Generate a Mermaid graph TB diagram from Aspire metadata."""
     lines = ["graph TB"]
     lines.append("    %% Orchestrator")
-    lines.append("    AppHost[AspireApp2.AppHost<br/>🎯 Orchestrator]")
+    lines.append(f"    AppHost[{metadata.get('apphost') or 'AppHost'}<br/>🎯 Orchestrator]")
     lines.append("")
 
     # Services
@@ -42,22 +75,22 @@ def build_architecture_diagram(metadata: dict) -> str:
         lines.append("    %% Application services")
         for svc in metadata["services"]:
             label = f"{svc['class']}<br/>🔗 {svc['name']}"
-            lines.append(f"    {svc['name']}[{label}]")
+            lines.append(f"    {_mermaid_id(svc['name'])}[{label}]")
         lines.append("")
 
     # Resources
     if metadata["resources"]:
         lines.append("    %% External resources")
         for res in metadata["resources"]:
-            lines.append(f"    {res['name']}[({res['name']}<br/>💾 {res['type']})]")
+            lines.append(f"    {_mermaid_id(res['name'])}[({res['name']}<br/>💾 {res['type']})]")
         lines.append("")
 
     # Orchestration edges (AppHost → each service/resource)
     lines.append("    %% Orchestration")
     for svc in metadata["services"]:
-        lines.append(f"    AppHost -.->|orchestrates| {svc['name']}")
+        lines.append(f"    AppHost -.->|orchestrates| {_mermaid_id(svc['name'])}")
     for res in metadata["resources"]:
-        lines.append(f"    AppHost -.->|manages| {res['name']}")
+        lines.append(f"    AppHost -.->|manages| {_mermaid_id(res['name'])}")
     lines.append("")
 
     # Dependency edges
@@ -74,7 +107,7 @@ def build_architecture_diagram(metadata: dict) -> str:
             edge = (from_svc, to_res)
             if edge not in seen_edges:
                 seen_edges.add(edge)
-                lines.append(f"    {from_svc} -->|uses| {to_res}")
+                lines.append(f"    {_mermaid_id(from_svc)} -->|uses| {_mermaid_id(to_res)}")
 
     lines.append("")
     lines.append("    %% Styling")
@@ -83,10 +116,10 @@ def build_architecture_diagram(metadata: dict) -> str:
     lines.append("    classDef resource fill:#e8f5e8,stroke:#1b5e20,stroke-width:2px")
     lines.append("    class AppHost orchestrator")
     if metadata["services"]:
-        names = ",".join(s["name"] for s in metadata["services"])
+        names = ",".join(_mermaid_id(s["name"]) for s in metadata["services"])
         lines.append(f"    class {names} service")
     if metadata["resources"]:
-        names = ",".join(r["name"] for r in metadata["resources"])
+        names = ",".join(_mermaid_id(r["name"]) for r in metadata["resources"])
         lines.append(f"    class {names} resource")
 
     return "```mermaid\n" + "\n".join(lines) + "\n```"
@@ -99,9 +132,9 @@ def build_event_flow_diagram(metadata: dict) -> str:
     lines.append("    participant AppHost as 🎯 AppHost")
 
     for res in metadata["resources"]:
-        lines.append(f"    participant {res['name']} as 💾 {res['name']}")
+        lines.append(f"    participant {_mermaid_id(res['name'])} as 💾 {res['name']}")
     for svc in metadata["services"]:
-        lines.append(f"    participant {svc['name']} as 🔗 {svc['name']}")
+        lines.append(f"    participant {_mermaid_id(svc['name'])} as 🔗 {svc['name']}")
 
     lines.append("")
     lines.append("    Note over AppHost: Application startup")
@@ -109,20 +142,24 @@ def build_event_flow_diagram(metadata: dict) -> str:
 
     # Resources start first
     for res in metadata["resources"]:
-        lines.append(f"    AppHost->>+{res['name']}: start container")
-        lines.append(f"    {res['name']}-->>-AppHost: ready ✅")
+        res_id = _mermaid_id(res["name"])
+        lines.append(f"    AppHost->>+{res_id}: start container")
+        lines.append(f"    {res_id}-->>-AppHost: ready ✅")
 
     lines.append("")
 
-    # Services start after their resources
+    # Services start after their resources (WithReference and WaitFor may both name one target)
     for svc in metadata["services"]:
-        lines.append(f"    AppHost->>+{svc['name']}: start service")
+        svc_id = _mermaid_id(svc["name"])
+        lines.append(f"    AppHost->>+{svc_id}: start service")
+        checked = set()
         for dep in metadata["dependencies"]:
-            if isinstance(dep, dict) and dep.get("from") == svc["name"]:
-                to_name = dep["to"]
-                lines.append(f"    {svc['name']}->>+{to_name}: health check")
-                lines.append(f"    {to_name}-->>-{svc['name']}: healthy ✅")
-        lines.append(f"    {svc['name']}-->>-AppHost: ready ✅")
+            if isinstance(dep, dict) and dep.get("from") == svc["name"] and dep["to"] not in checked:
+                checked.add(dep["to"])
+                to_id = _mermaid_id(dep["to"])
+                lines.append(f"    {svc_id}->>+{to_id}: health check")
+                lines.append(f"    {to_id}-->>-{svc_id}: healthy ✅")
+        lines.append(f"    {svc_id}-->>-AppHost: ready ✅")
 
     lines.append("")
     lines.append("    Note over AppHost: All services healthy — pipeline complete")
@@ -152,6 +189,13 @@ flowchart LR
 # Documentation generator
 # ---------------------------------------------------------------------------
 
+# Service table labels by AppHost registration method
+_SERVICE_TYPES = {
+    "AddProject": ".NET Aspire project",
+    "AddAzureFunctionsProject": "Azure Functions project",
+}
+
+
 def generate_documentation(metadata: dict, scrape_summary: dict, timestamp: str) -> str:
     """Compose the full Markdown documentation file."""
 
@@ -160,13 +204,17 @@ def generate_documentation(metadata: dict, scrape_summary: dict, timestamp: str)
     pipeline_diagram = build_pipeline_diagram()
 
     service_rows = "\n".join(
-        f"| `{s['name']}` | `{s['class']}` | .NET Aspire project |"
+        f"| `{s['name']}` | `{s['class']}` | {_SERVICE_TYPES.get(s.get('type', 'AddProject'), 'Executable app')} |"
         for s in metadata["services"]
     )
     resource_rows = "\n".join(
         f"| `{r['name']}` | `{r['type'].replace('Add', '')}` | External container |"
         for r in metadata["resources"]
     )
+    project_rows = "\n".join(
+        f"| `{p['name']}` | `{p['path']}` | {', '.join(f'`{r}`' for r in p['references']) or '—'} | {len(p['packages'])} |"
+        for p in metadata.get("projects", [])
+    )
     endpoint_rows = "\n".join(
         f"| `{e['method']}` | `{e['path']}` | `{e['file']}` |"
         for e in metadata["endpoints"]
@@ -231,6 +279,12 @@ by the AgentCamp Madrid 2026 pipeline — combining **Aspire**, **MCP Agents**,
 |------|------|------|
 {resource_rows if resource_rows else "| — | — | — |"}
 
+## Projects
+
+| Project | Path | References | Packages |
+|---------|------|------------|----------|
+{project_rows if project_rows else "| — | — | — | — |"}
+
 ## API Endpoints
 
 | Method | Path | Source |
@@ -267,8 +321,143 @@ by the AgentCamp Madrid 2026 pipeline — combining **Aspire**, **MCP Agents**,
 # Pipeline orchestration
 # ---------------------------------------------------------------------------
 
-def run_pipeline(project_dir: str, urls: list, output_dir: str) -> bool:
-    """Execute the full documentation pipeline."""
+def _log_files(files, file_log: list):
+    """Pass scanned file records through, remembering each one in ``file_log``."""
+    for file in files:
+        file_log.append(file)
+        yield file
+
+
+def analyze_project(project_path: str, state_dir: str, incremental: bool = False, workers: int = 1,
+                    cache: MetadataCache = None, file_log: list = None) -> tuple:
+    """
+    Scan a project tree and extract its Aspire metadata.
+
+    With ``incremental`` set, the file manifest lives in ``state_dir``.
+    ``workers`` > 1 hashes changed files and prefetches extraction reads on a
+    thread pool. ``cache`` is an optional ``MetadataCache``; the caller owns saving it.
+    If ``file_log`` is a list, the scanned file records are appended to it.
+
+    Returns:
+        A (metadata, scrape_summary) tuple.
+    """
+    changes = None
+    if not os.path.isdir(project_path):
+        project_files = []
+    elif incremental:
+        manifest_path = os.path.join(state_dir, ".scan-manifest.json")
+        changes = scan_project_changes(project_path, manifest_path, workers=workers)
+        project_files = changes["files"]
+    else:
+        # Stream the walk straight into the extractors; no file list is kept
+        project_files = iter_project_files(project_path, sort=True)
+    if file_log is not None:
+        project_files = _log_files(project_files, file_log)
+    metadata, stats = stream_extract(project_files, cache, workers=workers)
+    if changes is None:
+        print(f"📂 Scanned {stats['files']} files in {project_path}")
+
+    scrape_summary = {
+        "file_count": stats["files"],
+        "timestamp": datetime.now().isoformat(),
+    }
+    if changes is not None:
+        scrape_summary["changes"] = {key: changes[key] for key in ("added", "modified", "deleted")}
+    return metadata, scrape_summary
+
+
+def write_documentation(metadata: dict, scrape_summary: dict, timestamp: str, out_dir: Path) -> Path:
+    """Render the documentation and write ``SolutionOverview-<timestamp>.md`` into ``out_dir``."""
+    docs = generate_documentation(metadata, scrape_summary, timestamp)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_file = out_dir / f"SolutionOverview-{timestamp}.md"
+    out_file.write_text(docs, encoding="utf-8")
+    return out_file
+
+
+@dataclass
+class RemoteOptions:
+    """
+    Remote pages a pipeline run scrapes, and how it fetches them.
+
+    Attributes:
+        urls: Pages to scrape, or crawl seeds when ``crawl_depth`` is set.
+        sitemaps: Sitemap or site URLs whose listed pages are scraped too.
+        since: Only scrape sitemap pages modified after this time (default: the
+            previous sitemap run, recorded in ``<output_dir>/.sitemap-state.json``).
+        crawl_depth: Follow links breadth-first up to this many levels from ``urls``.
+        max_pages: Maximum pages fetched by a crawl.
+        scope: Crawl within each seed's directory (``"prefix"``) or host (``"origin"``).
+        concurrency: Maximum scrapes in flight overall.
+        per_host: Maximum scrapes in flight per origin.
+        pool_size: Idle keep-alive connections kept per host.
+        idle_timeout: Seconds before an idle keep-alive connection is dropped.
+        http_cache: Response cache directory (``""`` for ``<output_dir>/.http-cache/``);
+            cached URLs are re-fetched conditionally.
+        offline: Serve URLs only from the response cache.
+        keep_duplicates: Keep near-duplicate pages instead of collapsing them
+            into their first copy's ``alternate_urls``.
+    """
+
+    urls: list = field(default_factory=list)
+    sitemaps: list = field(default_factory=list)
+    since: datetime = None
+    crawl_depth: int = None
+    max_pages: int = 100
+    scope: str = "prefix"
+    concurrency: int = 8
+    per_host: int = 2
+    pool_size: int = DEFAULT_POOL_SIZE
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+    http_cache: str = None
+    offline: bool = False
+    keep_duplicates: bool = False
+
+
+@dataclass
+class OutputOptions:
+    """
+    Format of the raw scrape results and the stores updated alongside them.
+
+    Attributes:
+        ndjson: Write ``scrape-results.ndjson`` (JSON Lines, streamed as pages
+            complete, duplicates as ``duplicate_of`` stubs) instead of a JSON array.
+        codec: Compress the results file (``"gz"`` or ``"xz"``).
+        compact: Drop the JSON indentation.
+        blobs: Move large text fields into this directory (``""`` for ``<output_dir>/blobs/``).
+        store: Append the run to the SQLite history in ``<output_dir>/scrape-store.sqlite``.
+        index: Update the BM25 search index in ``<output_dir>/search-index.sqlite``.
+        chunk_bytes: Write page texts and project files as chunk records of at most this size.
+    """
+
+    ndjson: bool = False
+    codec: str = None
+    compact: bool = False
+    blobs: str = None
+    store: bool = False
+    index: bool = False
+    chunk_bytes: int = None
+
+
+def run_pipeline(project_dir: str, output_dir: str, remote: RemoteOptions = None, output: OutputOptions = None,
+                 incremental: bool = False, workers: int = 1) -> bool:
+    """
+    Execute the full documentation pipeline: scrape, analyze, generate.
+
+    Args:
+        project_dir: Project source directory, relative to the repository root.
+        output_dir: Directory for the documentation, raw results and run state.
+        remote: Remote pages to scrape (default: none).
+        output: Raw results format and stores (default: an indented JSON array).
+        incremental: Keep a file manifest and metadata cache in ``output_dir``
+            so unchanged files are neither re-read nor re-parsed.
+        workers: Reader threads for file scans and extraction.
+
+    Returns:
+        True once the documentation has been written.
+    """
+    remote = remote or RemoteOptions()
+    output = output or OutputOptions()
 
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     print(f"\n{'='*60}")
@@ -278,25 +467,64 @@ def run_pipeline(project_dir: str, urls: list, output_dir: str) -> bool:
 
     # --- Step 1: Scrape ---
     print("📡 Step 1/3 — Scraping project files…")
-    project_path = str(_ROOT / project_dir)
-    project_files = scrape_project_files(project_path) if os.path.isdir(project_path) else []
-    metadata = extract_aspire_metadata(project_files)
-
-    scrape_summary = {
-        "file_count": len(project_files),
-        "timestamp": datetime.now().isoformat(),
-    }
-
-    raw_results = [{"type": "project_scan", **scrape_summary, "metadata": metadata}]
-
-    # Optionally scrape remote URLs
-    for url in urls:
-        print(f"🌐 Scraping URL: {url}")
-        raw_results.append(scrape_url(url))
-
-    # Save raw scrape data
-    scrape_output = str(_ROOT / output_dir / "scrape-results.json")
-    save_scrape_results(raw_results, scrape_output)
+    out_dir = _ROOT / output_dir
+    cache = MetadataCache(str(out_dir / ".metadata-cache.json")) if incremental else None
+    file_log = [] if output.store or output.index or output.chunk_bytes else None
+    metadata, scrape_summary = analyze_project(str(_ROOT / project_dir), str(out_dir), incremental, workers,
+                                               cache, file_log)
+    if cache is not None:
+        cache.save()
+        print(f"🧠 Metadata cache: {cache.hits} hits, {cache.misses} misses")
+    search_index = SearchIndex(str(out_dir / "search-index.sqlite")) if output.index else None
+    if search_index is not None:
+        search_index.update_files(file_log)
+
+    # Raw scrape data: the project scan, then remote pages written as they complete
+    scrape_output = results_path(out_dir / "scrape-results.json", output.ndjson, output.codec)
+    blob_store = None
+    if output.blobs is not None:
+        blob_store = BlobStore(str(_ROOT / output.blobs if output.blobs else out_dir / "blobs"))
+    history = ScrapeStore(str(out_dir / "scrape-store.sqlite")) if output.store else None
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(ResultWriter(scrape_output, compact=output.compact, blobs=blob_store))
+        run = None
+        if search_index is not None:
+            stack.callback(search_index.close)
+            stack.callback(search_index.commit)
+        if history is not None:
+            stack.callback(history.close)
+            run = stack.enter_context(history.run(root=project_dir, started_at=scrape_summary["timestamp"]))
+            run.add_files(file_log)
+            run.add_metadata(metadata)
+        writer.write({"type": "project_scan", **scrape_summary, "metadata": metadata})
+        if output.chunk_bytes:
+            for record in iter_file_chunks(file_log, output.chunk_bytes):
+                writer.write(record)
+        if remote.urls or remote.sitemaps:
+            response_cache = None
+            if remote.http_cache is not None or remote.offline:
+                cache_dir = _ROOT / remote.http_cache if remote.http_cache else out_dir / ".http-cache"
+                response_cache = HTTPCache(str(cache_dir), offline=remote.offline)
+            pool = HTTPConnectionPool(remote.pool_size, remote.idle_timeout)
+            stack.callback(pool.close)
+            state = SitemapState(str(out_dir / ".sitemap-state.json")) if remote.sitemaps else None
+            results = iter_remote_results(
+                remote.urls, remote.sitemaps, remote.since, state,
+                crawl_depth=remote.crawl_depth, max_pages=remote.max_pages, scope=remote.scope,
+                concurrency=remote.concurrency, per_host=remote.per_host, http_cache=response_cache, pool=pool,
+            )
+            write_remote_results(results, writer, run, search_index, output.chunk_bytes, remote.keep_duplicates)
+            if response_cache is not None:
+                response_cache.save()
+                print(f"🗄️  HTTP cache: {response_cache.hits + response_cache.revalidated} reused, {response_cache.misses} downloaded")
+    print(f"💾 Saved {writer.count} scrape results to {scrape_output}")
+    if blob_store is not None:
+        print(f"🧱 Blobs: {blob_store.written} written, {blob_store.reused} reused")
+    if history is not None:
+        print(f"🗃️  Recorded run #{run.run_id} in {history.path}")
+    if search_index is not None:
+        print(f"🔎 Search index: {search_index.indexed} indexed, {search_index.skipped} unchanged, "
+              f"{search_index.removed} removed")
 
     # --- Step 2: Analyze ---
     print(f"\n🔍 Step 2/3 — Analyzing architecture…")
@@ -306,18 +534,154 @@ def run_pipeline(project_dir: str, urls: list, output_dir: str) -> bool:
 
     # --- Step 3: Generate ---
     print(f"\n📝 Step 3/3 — Generating documentation…")
-    docs = generate_documentation(metadata, scrape_summary, timestamp)
-
-    out_dir = _ROOT / output_dir
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / f"SolutionOverview-{timestamp}.md"
-    out_file.write_text(docs, encoding="utf-8")
+    out_file = write_documentation(metadata, scrape_summary, timestamp, out_dir)
 
     print(f"\n✅ Documentation saved to: {out_file}")
     print(f"{'='*60}\n")
     return True
 
 
+# ---------------------------------------------------------------------------
+# Fleet mode (many repositories, one process pool)
+# ---------------------------------------------------------------------------
+
+# Per-worker metadata cache, loaded once by the pool initializer and reused across roots
+_FLEET_CACHE = None
+
+
+def read_fleet_manifest(path: str) -> list:
+    """Read project roots from a fleet manifest: a JSON list, or one path per line (``#`` comments)."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [str(root) for root in json.loads(text)]
+    roots = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            roots.append(line)
+    return roots
+
+
+def _fleet_slugs(roots: list) -> list:
+    """
+    Unique output sub-directory names for each root.
+
+    A root is named by its path below the roots' common prefix
+    (``repos/a/src`` and ``repos/b/src`` become ``a_src`` and ``b_src``),
+    suffixed on collisions.
+    """
+    paths = [os.path.abspath(root) for root in roots]
+    common = os.path.commonpath(paths) if len(paths) > 1 else None
+    slugs, seen = [], {}
+    for path in paths:
+        rel = os.path.relpath(path, common) if common else "."
+        if rel == ".":
+            rel = os.path.basename(path)
+        base = re.sub(r"[^\w.-]", "_", rel) or "root"
+        seen[base] = seen.get(base, 0) + 1
+        slugs.append(base if seen[base] == 1 else f"{base}-{seen[base]}")
+    return slugs
+
+
+def _init_fleet_worker(cache_path: str) -> None:
+    global _FLEET_CACHE
+    _FLEET_CACHE = MetadataCache(cache_path)
+
+
+def _run_fleet_job(root: str, out_dir: str, timestamp: str, incremental: bool) -> dict:
+    """Document one root inside a pool worker; returns its summary and the cache entries it touched."""
+    started = time.time()
+    summary = {"root": root, "output_dir": out_dir}
+    try:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Project root not found: {root}")
+        metadata, scrape_summary = analyze_project(root, out_dir, incremental, 1, _FLEET_CACHE)
+        save_scrape_results(
+            [{"type": "project_scan", **scrape_summary, "metadata": metadata}],
+            os.path.join(out_dir, "scrape-results.json"),
+        )
+        out_file = write_documentation(metadata, scrape_summary, timestamp, Path(out_dir))
+        summary.update({
+            "documentation": str(out_file),
+            "file_count": scrape_summary["file_count"],
+            "services": len(metadata["services"]),
+            "resources": len(metadata["resources"]),
+            "dependencies": len(metadata["dependencies"]),
+            "endpoints": len(metadata["endpoints"]),
+        })
+    except Exception as exc:
+        summary["error"] = str(exc)
+    summary["seconds"] = round(time.time() - started, 3)
+    touched = {key: entry for key, entry in _FLEET_CACHE.entries.items() if entry["used"] >= started}
+    return {"summary": summary, "cache_entries": touched}
+
+
+def run_fleet(roots: list, output_dir: str, jobs: int = None, incremental: bool = True) -> bool:
+    """
+    Document many project roots in one process pool with a shared metadata cache.
+
+    Each root is written to ``<output_dir>/<root name>/`` (SolutionOverview and
+    scrape results, plus its scan manifest when ``incremental``). Workers load
+    the fleet-wide ``<output_dir>/.metadata-cache.json`` once and keep it warm
+    across the roots they process; the entries each job touched are merged back
+    and saved once. An aggregate ``FleetSummary-<timestamp>.md`` and
+    ``fleet-summary.json`` are written to ``output_dir``.
+
+    Returns:
+        True if every root was documented without error.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_root = _ROOT / output_dir
+    out_root.mkdir(parents=True, exist_ok=True)
+    cache_path = str(out_root / ".metadata-cache.json")
+    cache = MetadataCache(cache_path)
+
+    print(f"\n{'='*60}")
+    print(f"🚀 AgentCamp Documentation Pipeline — fleet of {len(roots)} roots")
+    print(f"⏰ Timestamp: {timestamp}")
+    print(f"{'='*60}\n")
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_fleet_worker, initargs=(cache_path,)) as pool:
+        roots = [str(_ROOT / root) for root in roots]
+        futures = [
+            pool.submit(_run_fleet_job, root, str(out_root / slug), timestamp, incremental)
+            for root, slug in zip(roots, _fleet_slugs(roots))
+        ]
+        for future in futures:
+            result = future.result()
+            cache.entries.update(result["cache_entries"])
+            summaries.append(result["summary"])
+    cache.save()
+
+    rows = "\n".join(
+        f"| `{s['root']}` | {s.get('file_count', '—')} | {s.get('services', '—')} | {s.get('resources', '—')} "
+        f"| {s.get('endpoints', '—')} | {s['seconds']} | {'❌ ' + s['error'] if 'error' in s else '✅'} |"
+        for s in summaries
+    )
+    (out_root / f"FleetSummary-{timestamp}.md").write_text(
+        f"""# Fleet Summary
+
+| Root | Files | Services | Resources | Endpoints | Seconds | Status |
+|------|-------|----------|-----------|-----------|---------|--------|
+{rows if rows else "| — | — | — | — | — | — | — |"}
+
+---
+
+*Generated automatically by `pipeline.py` on {timestamp}*
+""",
+        encoding="utf-8",
+    )
+    with open(out_root / "fleet-summary.json", "w", encoding="utf-8") as f:
+        json.dump({"timestamp": timestamp, "roots": summaries}, f, indent=2, ensure_ascii=False)
+
+    failed = [s for s in summaries if "error" in s]
+    print(f"\n✅ Documented {len(summaries) - len(failed)}/{len(summaries)} roots into: {out_root}")
+    print(f"{'='*60}\n")
+    return not failed
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="AgentCamp documentation pipeline: scrape → analyze → generate Mermaid docs"
@@ -334,9 +698,128 @@ def main():
         "--output-dir", default="docs",
         help="Output directory for generated documentation (default: docs)"
     )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Keep a file manifest and metadata cache in the output directory; only changed files are re-read and re-parsed"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of parallel file reader threads for scans and extraction (default: 1)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8,
+        help="Maximum concurrent URL scrapes (default: 8)"
+    )
+    parser.add_argument(
+        "--per-host", type=int, default=2,
+        help="Maximum concurrent URL scrapes per host (default: 2)"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+        help=f"Idle keep-alive connections kept per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser.add_argument(
+        "--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Seconds before an idle keep-alive connection is dropped (default: {DEFAULT_IDLE_TIMEOUT:g})"
+    )
+    parser.add_argument(
+        "--http-cache", nargs="?", const="", metavar="DIR",
+        help="Cache URL responses in DIR (default: <output-dir>/.http-cache/) and re-fetch them conditionally (ETag/Last-Modified)"
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Serve URLs only from the HTTP cache, without network access (implies --http-cache)"
+    )
+    parser.add_argument(
+        "--crawl", type=int, nargs="?", const=DEFAULT_CRAWL_DEPTH, metavar="DEPTH",
+        help=f"Crawl breadth-first from the --url seeds, following links up to DEPTH levels deep (default: {DEFAULT_CRAWL_DEPTH})"
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=100,
+        help="Maximum pages fetched by --crawl (default: 100)"
+    )
+    parser.add_argument(
+        "--scope", choices=CRAWL_SCOPES, default="prefix",
+        help="Keep --crawl within each seed's directory (prefix) or host (origin) (default: prefix)"
+    )
+    parser.add_argument(
+        "--sitemap", action="append", default=[], metavar="URL",
+        help="Scrape the pages listed in this sitemap, or in a site's sitemaps from robots.txt (can be repeated)"
+    )
+    parser.add_argument(
+        "--since", metavar="DATE",
+        help="Only scrape sitemap pages modified after this ISO date (default: the previous sitemap run)"
+    )
+    parser.add_argument(
+        "--keep-duplicates", action="store_true",
+        help="Keep near-duplicate pages instead of collapsing them into alternate_urls"
+    )
+    parser.add_argument(
+        "--ndjson", action="store_true",
+        help="Write raw results to scrape-results.ndjson (JSON Lines), streamed as pages complete"
+    )
+    parser.add_argument(
+        "--output-codec", choices=("gz", "xz"),
+        help="Compress the raw scrape results (scrape-results.json.gz / .xz)"
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Write scrape-results.json without indentation"
+    )
+    parser.add_argument(
+        "--blobs", nargs="?", const="", metavar="DIR",
+        help="Store large page texts once, content-addressed, in DIR (default: <output-dir>/blobs/) instead of inline"
+    )
+    parser.add_argument(
+        "--store", action="store_true",
+        help="Append this run to the SQLite history in <output-dir>/scrape-store.sqlite (query it with scrape_store.py)"
+    )
+    parser.add_argument(
+        "--index", action="store_true",
+        help="Update the BM25 search index in <output-dir>/search-index.sqlite (query it with search_index.py)"
+    )
+    parser.add_argument(
+        "--chunk", type=int, nargs="?", const=DEFAULT_CHUNK_BYTES, metavar="BYTES",
+        help=f"Write page texts and project files as chunk records of at most BYTES (default: {DEFAULT_CHUNK_BYTES})"
+    )
+    parser.add_argument(
+        "--fleet", action="append", default=[], metavar="ROOT",
+        help="Fleet mode: document this project root (can be repeated; ignores --project-dir and --url)"
+    )
+    parser.add_argument(
+        "--fleet-manifest",
+        help="Fleet mode: file listing project roots (JSON list or one path per line)"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None,
+        help="Worker processes for fleet mode (default: CPU count)"
+    )
     args = parser.parse_args()
-
-    success = run_pipeline(args.project_dir, args.url, args.output_dir)
+    since = parse_lastmod(args.since)
+    if args.since and since is None:
+        parser.error(f"--since: not an ISO date: {args.since}")
+    if args.chunk is not None and args.chunk < 64:
+        parser.error("--chunk: chunks must allow at least 64 bytes")
+
+    roots = list(args.fleet)
+    if args.fleet_manifest:
+        roots.extend(read_fleet_manifest(args.fleet_manifest))
+    if roots:
+        success = run_fleet(roots, args.output_dir, jobs=args.jobs)
+    else:
+        remote = RemoteOptions(
+            urls=args.url, sitemaps=args.sitemap, since=since,
+            crawl_depth=args.crawl, max_pages=args.max_pages, scope=args.scope,
+            concurrency=args.concurrency, per_host=args.per_host,
+            pool_size=args.pool_size, idle_timeout=args.idle_timeout,
+            http_cache=args.http_cache, offline=args.offline, keep_duplicates=args.keep_duplicates,
+        )
+        output = OutputOptions(
+            ndjson=args.ndjson, codec=args.output_codec, compact=args.compact, blobs=args.blobs,
+            store=args.store, index=args.index, chunk_bytes=args.chunk,
+        )
+        success = run_pipeline(args.project_dir, args.output_dir, remote, output,
+                               incremental=args.incremental, workers=args.workers)
     sys.exit(0 if success else 1)
 
 
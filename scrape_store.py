@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+SQLite store for scrape results, kept across pipeline runs.
+
+Each run's scanned files, scraped pages and extracted Aspire metadata
+(services, resources, dependencies, endpoints) are appended to one database,
+so questions about the history of a solution ("when did apiservice start
+referencing cache?") are a single indexed query instead of a reparse of
+every old scrape-results.json.
+"""
+
+import os
+import sys
+import sqlite3
+import hashlib
+import contextlib
+from datetime import datetime
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    root        TEXT,
+    apphost     TEXT,
+    file_count  INTEGER NOT NULL DEFAULT 0,
+    page_count  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    path        TEXT NOT NULL,
+    extension   TEXT,
+    size        INTEGER,
+    sha256      TEXT,
+    PRIMARY KEY (run_id, path)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    url         TEXT NOT NULL,
+    title       TEXT,
+    text_sha256 TEXT,
+    text_length INTEGER,
+    fetched_at  TEXT,
+    error       TEXT,
+    duplicate_of TEXT,
+    PRIMARY KEY (run_id, url)
+);
+CREATE TABLE IF NOT EXISTS services (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    class       TEXT,
+    type        TEXT,
+    project     TEXT
+);
+CREATE TABLE IF NOT EXISTS resources (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    type        TEXT
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    source      TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    kind        TEXT
+);
+CREATE TABLE IF NOT EXISTS endpoints (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    method      TEXT,
+    path        TEXT,
+    project     TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS files_path ON files (path, run_id);
+CREATE INDEX IF NOT EXISTS files_sha ON files (sha256);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, run_id);
+CREATE INDEX IF NOT EXISTS services_name ON services (name, run_id);
+CREATE INDEX IF NOT EXISTS services_run ON services (run_id);
+CREATE INDEX IF NOT EXISTS resources_name ON resources (name, run_id);
+CREATE INDEX IF NOT EXISTS dependencies_edge ON dependencies (source, target, run_id);
+CREATE INDEX IF NOT EXISTS dependencies_target ON dependencies (target, run_id);
+CREATE INDEX IF NOT EXISTS endpoints_path ON endpoints (path, run_id);
+CREATE INDEX IF NOT EXISTS endpoints_project ON endpoints (project, run_id);
+"""
+
+
+def _file_digest(file) -> str:
+    """SHA-256 of a lazily scanned file's bytes, read in blocks from disk."""
+    digest = hashlib.sha256()
+    with open(file["full_path"], "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RunRecorder:
+    """
+    Collects one run's rows inside the store's open transaction.
+
+    Pages are inserted as they arrive; files and metadata are inserted in
+    bulk with ``executemany``. Obtain one from ``ScrapeStore.run()``.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_id: int):
+        self.conn = conn
+        self.run_id = run_id
+        self.file_count = 0
+        self.page_count = 0
+        self.apphost = None
+
+    def add_files(self, files) -> None:
+        """
+        Record scanned files (``ProjectFile`` records or scan dicts; content is not stored).
+
+        ``size`` is the file's size on disk and ``sha256`` the hash of its raw
+        bytes; lazy records, which carry no hash, are hashed here.
+        """
+        rows = []
+        for file in files:
+            digest = file.get("sha256")
+            if digest is None:
+                try:
+                    digest = _file_digest(file)
+                except OSError as e:
+                    print(f"⚠️  Could not hash {file['path']}: {e}")
+            rows.append((self.run_id, file["path"], file.get("extension"), file.get("size"), digest))
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+        self.file_count += len(rows)
+
+    def add_page(self, result: dict) -> None:
+        """Record one ``scrape_url`` result (or ``duplicate_of`` stub); other results are ignored."""
+        if "url" not in result:
+            return
+        text = result.get("text")
+        if not isinstance(text, str):
+            text = None  # absent, or a blob reference
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id,
+                result["url"],
+                result.get("title"),
+                hashlib.sha256(text.encode("utf-8")).hexdigest() if text else None,
+                len(text) if text is not None else None,
+                result.get("timestamp"),
+                result.get("error"),
+                result.get("duplicate_of"),
+            ),
+        )
+        self.page_count += 1
+
+    def add_metadata(self, metadata: dict) -> None:
+        """Record extracted services, resources, dependencies and endpoints."""
+        self.apphost = metadata.get("apphost")
+        self.conn.executemany(
+            "INSERT INTO services VALUES (?, ?, ?, ?, ?)",
+            [(self.run_id, s["name"], s.get("class"), s.get("type"), s.get("project"))
+             for s in metadata.get("services", ())],
+        )
+        self.conn.executemany(
+            "INSERT INTO resources VALUES (?, ?, ?)",
+            [(self.run_id, r["name"], r.get("type")) for r in metadata.get("resources", ())],
+        )
+        self.conn.executemany(
+            "INSERT INTO dependencies VALUES (?, ?, ?, ?)",
+            [(self.run_id, d["from"], d["to"], d.get("kind")) for d in metadata.get("dependencies", ())],
+        )
+        self.conn.executemany(
+            "INSERT INTO endpoints VALUES (?, ?, ?, ?)",
+            [(self.run_id, e.get("method"), e.get("path"), e.get("project")) for e in metadata.get("endpoints", ())],
+        )
+
+
+class ScrapeStore:
+    """
+    Append-only history of scrape runs in a SQLite database.
+
+    Every run is written inside a single transaction (see ``run()``), so a
+    failed run leaves no partial rows behind and bulk inserts stay fast. The
+    database uses WAL journaling, so queries can run while a run is being
+    recorded.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def run(self, root: str = None, started_at: str = None):
+        """
+        Record one run: yields a ``RunRecorder``, committed when the block exits.
+
+        An exception rolls the whole run back.
+        """
+        started_at = started_at or datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at, root) VALUES (?, ?)", (started_at, root))
+            recorder = RunRecorder(self.conn, cursor.lastrowid)
+            yield recorder
+            self.conn.execute(
+                "UPDATE runs SET file_count = ?, page_count = ?, apphost = ? WHERE id = ?",
+                (recorder.file_count, recorder.page_count, recorder.apphost, recorder.run_id),
+            )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self, sql: str, params=()) -> list:
+        """Run an arbitrary read query; rows are ``sqlite3.Row`` (dict-like)."""
+        return self.conn.execute(sql, params).fetchall()
+
+    def runs(self, limit: int = 20) -> list:
+        """The most recent runs, newest first."""
+        return self.query("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,))
+
+    def dependency_history(self, source: str, target: str, root: str = None) -> list:
+        """
+        Every run with whether ``source`` depended on ``target`` in it, oldest first.
+
+        Rows have: run_id, started_at, kinds (comma-separated, NULL when absent).
+        """
+        return self.query(
+            """
+            SELECT r.id AS run_id, r.started_at,
+                   (SELECT group_concat(DISTINCT d.kind) FROM dependencies d
+                    WHERE d.run_id = r.id AND d.source = ? AND d.target = ?) AS kinds
+            FROM runs r
+            WHERE ? IS NULL OR r.root = ?
+            ORDER BY r.started_at
+            """,
+            (source, target, root, root),
+        )
+
+    def dependency_added(self, source: str, target: str, root: str = None):
+        """The run in which ``source`` most recently gained a dependency on ``target``, or None."""
+        added = None
+        present = False
+        for row in self.dependency_history(source, target, root):
+            if row["kinds"] and not present:
+                added = row
+            present = bool(row["kinds"])
+        return added if present else None
+
+    def service_history(self, name: str) -> list:
+        """Runs in which a service appeared, oldest first."""
+        return self.query(
+            """
+            SELECT r.id AS run_id, r.started_at, s.type, s.project
+            FROM services s JOIN runs r ON r.id = s.run_id
+            WHERE s.name = ?
+            ORDER BY r.started_at
+            """,
+            (name,),
+        )
+
+    def page_history(self, url: str) -> list:
+        """Every stored fetch of a URL, oldest first; text_sha256 changes mark content changes."""
+        return self.query(
+            """
+            SELECT r.id AS run_id, r.started_at, p.title, p.text_sha256, p.text_length, p.error
+            FROM pages p JOIN runs r ON r.id = p.run_id
+            WHERE p.url = ?
+            ORDER BY r.started_at
+            """,
+            (url,),
+        )
+
+
+def main():
+    """CLI: inspect a scrape store."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the scrape history database")
+    parser.add_argument("store", help="Path to the SQLite store (e.g. docs/scrape-store.sqlite)")
+    parser.add_argument("--runs", type=int, nargs="?", const=20, help="List the most recent runs")
+    parser.add_argument("--dependency", nargs=2, metavar=("SOURCE", "TARGET"),
+                        help="Show when SOURCE gained a dependency on TARGET")
+    parser.add_argument("--service", help="Show the runs a service appeared in")
+    parser.add_argument("--page", help="Show the fetch history of a URL")
+    parser.add_argument("--sql", help="Run a read-only SQL query and print its rows")
+    args = parser.parse_args()
+
+    with ScrapeStore(args.store) as store:
+        if args.runs:
+            for row in store.runs(args.runs):
+                print(f"#{row['id']}  {row['started_at']}  {row['root'] or '-'}  "
+                      f"{row['file_count']} files, {row['page_count']} pages")
+        if args.dependency:
+            source, target = args.dependency
+            added = store.dependency_added(source, target)
+            if added is None:
+                print(f"❌ {source} does not currently depend on {target}")
+            else:
+                print(f"✅ {source} → {target} since run #{added['run_id']} ({added['started_at']}, {added['kinds']})")
+        if args.service:
+            for row in store.service_history(args.service):
+                print(f"#{row['run_id']}  {row['started_at']}  {row['type']}  {row['project'] or '-'}")
+        if args.page:
+            for row in store.page_history(args.page):
+                print(f"#{row['run_id']}  {row['started_at']}  {row['text_sha256'] or row['error']}")
+        if args.sql:
+            store.conn.execute("PRAGMA query_only=ON")
+            for row in store.conn.execute(args.sql):
+                print(tuple(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,11 +10,48 @@ import re
 import sys
 import json
 import time
-import urllib.request
+import mmap
+import zlib
+import gzip
+import lzma
+import asyncio
+import hashlib
+import threading
+import queue
+import contextlib
+import itertools
+import codecs
+import html
 import urllib.parse
-import urllib.robotparser
-from pathlib import Path
-from datetime import datetime
+import posixpath
+import xml.etree.ElementTree as ET
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# The HTTP layer lives in http_client.py; its public names are re-exported here
+from http_client import (
+    USER_AGENT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_IDLE_TIMEOUT,
+    PooledResponse,
+    HTTPConnectionPool,
+    HTTPCache,
+    ACCEPT_ENCODING,
+    DEFAULT_MAX_DECODED_BYTES,
+    decode_content,
+    iter_url,
+    fetch_url,
+    ROBOTS_USER_AGENT,
+    RobotsCache,
+    is_allowed_by_robots,
+    RetryPolicy,
+    CircuitBreaker,
+    _host_key,
+    _ROBOTS_CACHE,
+    _RETRY_POLICY,
+    _CIRCUIT_BREAKER,
+)
 
 
 def read_local_file(path: str) -> str:
@@ -23,247 +60,2572 @@ def read_local_file(path: str) -> str:
         return f.read()
 
 
-def fetch_url(url: str, timeout: int = 10) -> str:
-    """Fetch content from a URL with a basic User-Agent header."""
-    req = urllib.request.Request(
-        url,
-        headers={"User-Agent": "AgentCampDocBot/1.0 (+https://github.com/davidop/agentcamp-madrid-2026)"},
-    )
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read().decode("utf-8", errors="replace")
+def _read_with_digest(path: str) -> tuple:
+    """Read a local file as (decoded content, SHA-256 of its raw bytes)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode_file_bytes(data), hashlib.sha256(data).hexdigest()
 
 
-def is_allowed_by_robots(url: str) -> bool:
-    """Check whether the given URL is allowed to be scraped according to robots.txt."""
-    parsed = urllib.parse.urlparse(url)
-    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-    rp = urllib.robotparser.RobotFileParser()
-    try:
-        rp.set_url(robots_url)
-        rp.read()
-        return rp.can_fetch("AgentCampDocBot", url)
-    except Exception:
-        # If robots.txt is not accessible, allow scraping
-        return True
+def decode_file_bytes(data: bytes) -> str:
+    """Decode raw file bytes exactly like ``read_local_file`` (UTF-8, universal newlines)."""
+    text = data.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# Upper bound on the bytes of one page fed to the HTML extractor
+DEFAULT_MAX_PAGE_BYTES = 8 * 1024 * 1024
+
+# Whitespace that needs rewriting: any run of 2+ characters, or a lone non-space one
+_WHITESPACE_RUN_RE = re.compile(r"\s{2,}|[^\S ]")
+
+# Tags the extractor acts on (and comment openers); every other tag just becomes whitespace
+_SPECIAL_TAG_RE = re.compile(r"<!--|<(/?)(script|style|title)\b[^>]*>", re.IGNORECASE)
+_RAW_TEXT_END_RE = {
+    "script": re.compile(r"</script\b[^>]*>", re.IGNORECASE),
+    "style": re.compile(r"</style\b[^>]*>", re.IGNORECASE),
+    "comment": re.compile(r"-->"),
+}
+_TAG_RE = re.compile(r"<[^>]*>")
+_LINK_RE = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_PARTIAL_ENTITY_RE = re.compile(r"&#?\w{0,31}\Z")
+
+# Longest unterminated "<..." kept back waiting for its ">"; beyond this it is text
+_MAX_PENDING_TAG = 64 * 1024
+
+
+def _collapse_whitespace(match) -> str:
+    newlines = match.group().count("\n")
+    return "\n" * min(newlines, 2) or " "
+
+
+class HTMLTextExtractor:
+    """
+    Incremental HTML-to-text converter.
+
+    Markup is fed in chunks (``feed`` for text, ``feed_bytes`` for raw UTF-8
+    through an incremental decoder), so a page never has to be held whole:
+    only a tag or entity split across a chunk boundary is carried over.
+    ``<script>``/``<style>`` content and ``<!-- -->`` comments are skipped
+    with a linear search for their end, ``<title>`` is captured on the way, other tags become
+    whitespace, entities are unescaped and whitespace runs collapse to a
+    single space or at most one blank line. ``read_text()`` drains the text
+    produced so far, which keeps the output buffer bounded by the chunk size.
+    With ``collect_links`` set, ``<a href>`` targets are gathered in ``links``.
+    """
+
+    def __init__(self, collect_links: bool = False):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._skipping = None  # name of the raw-text element being dropped
+        self._in_title = False
+        self._title_parts = []
+        self.links = [] if collect_links else None
+        self._parts = []
+        self._pending_newlines = None  # None: no pending whitespace; else newlines seen in the run
+        self._started = False
+
+    @property
+    def title(self) -> str:
+        return " ".join("".join(self._title_parts).split())
+
+    def feed(self, data: str) -> None:
+        self._buffer += data
+        self._process(final=False)
+
+    def feed_bytes(self, data: bytes, final: bool = False) -> None:
+        self.feed(self._decoder.decode(data, final))
+
+    def close(self) -> None:
+        self._process(final=True)
+
+    def read_text(self) -> str:
+        """Return and clear the text extracted since the last call."""
+        text = "".join(self._parts)
+        self._parts.clear()
+        return text
+
+    def _process(self, final: bool) -> None:
+        buf, pos = self._buffer, 0
+        while True:
+            if self._skipping:
+                match = _RAW_TEXT_END_RE[self._skipping].search(buf, pos)
+                if match is None:
+                    # Drop the skipped content but keep enough to catch a split end tag
+                    pos = len(buf) if final else max(pos, len(buf) - 16)
+                    break
+                self._skipping = None
+                self._space()
+                pos = match.end()
+                continue
+
+            match = _SPECIAL_TAG_RE.search(buf, pos)
+            if match is None:
+                end = len(buf) if final else self._safe_end(buf, pos)
+                self._text(buf[pos:end])
+                pos = end
+                break
+
+            self._text(buf[pos:match.start()])
+            if match.group(2) is None:
+                # Comment: dropped up to "-->", tags inside it included
+                self._skipping = "comment"
+                self._space()
+                pos = match.end()
+                continue
+            closing, name = match.group(1), match.group(2).lower()
+            if name == "title":
+                self._in_title = not closing
+            elif not closing:
+                self._skipping = name
+            self._space()
+            pos = match.end()
+        self._buffer = buf[pos:]
+
+    def _safe_end(self, buf: str, pos: int) -> int:
+        """End of the text that can be converted now, holding back a split tag or entity."""
+        end = len(buf)
+        lt = buf.rfind("<", pos)
+        if lt != -1 and buf.find(">", lt) == -1 and end - lt <= _MAX_PENDING_TAG:
+            end = lt
+        partial = _PARTIAL_ENTITY_RE.search(buf, pos, end)
+        return partial.start() if partial else end
+
+    def _text(self, markup: str) -> None:
+        if not markup:
+            return
+        if self.links is not None:
+            self.links.extend(html.unescape("".join(href)) for href in _LINK_RE.findall(markup))
+        text = _TAG_RE.sub(" ", markup)
+        if "&" in text:
+            text = html.unescape(text)
+        if self._in_title:
+            self._title_parts.append(text)
+        self._write(text)
+
+    def _space(self, newlines: int = 0) -> None:
+        """Record whitespace between words, counting the newlines in the run."""
+        self._pending_newlines = (self._pending_newlines or 0) + newlines
+
+    def _write(self, text: str) -> None:
+        core = text.strip()
+        if not core:
+            self._space(text.count("\n"))
+            return
+        if text[0].isspace():
+            self._space(text[:len(text) - len(text.lstrip())].count("\n"))
+        if self._started and self._pending_newlines is not None:
+            self._parts.append("\n" * min(self._pending_newlines, 2) or " ")
+        self._parts.append(_WHITESPACE_RUN_RE.sub(_collapse_whitespace, core))
+        self._started = True
+        self._pending_newlines = None
+        if text[-1].isspace():
+            self._space(text[len(text.rstrip()):].count("\n"))
+
+
+def extract_html_text(chunks, max_bytes: int = DEFAULT_MAX_PAGE_BYTES, collect_links: bool = False) -> dict:
+    """
+    Convert a stream of HTML byte chunks to text without buffering the page.
+
+    At most ``max_bytes`` of input are read; the rest of the stream is not consumed.
+
+    Returns:
+        A dict with keys: title, text, truncated, and links (raw hrefs) when
+        ``collect_links`` is set.
+    """
+    parser = HTMLTextExtractor(collect_links)
+    text_parts = []
+    remaining = max_bytes
+    truncated = False
+    for chunk in chunks:
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            truncated = True
+        remaining -= len(chunk)
+        parser.feed_bytes(chunk)
+        text_parts.append(parser.read_text())
+        if truncated:
+            break
+    if hasattr(chunks, "close"):
+        chunks.close()
+    parser.feed_bytes(b"", final=True)
+    parser.close()
+    text_parts.append(parser.read_text())
+    page = {"title": parser.title, "text": "".join(text_parts), "truncated": truncated}
+    if collect_links:
+        page["links"] = parser.links
+    return page
 
 
 def strip_html_tags(html: str) -> str:
     """Remove HTML tags and return plain text."""
-    # Remove script and style elements
-    html = re.sub(r"<(script|style)[^>]*>.*?</(script|style)[^>]*>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    # Remove all remaining tags
-    text = re.sub(r"<[^>]+>", " ", html)
-    # Collapse whitespace
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
+    parser = HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.read_text()
 
 
-def scrape_url(url: str, respect_robots: bool = True) -> dict:
+def scrape_url(url: str, respect_robots: bool = True, robots: RobotsCache = None,
+               http_cache: HTTPCache = None, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+               links: list = None, retry: RetryPolicy = None, breaker: CircuitBreaker = None,
+               pool: HTTPConnectionPool = None) -> dict:
     """
     Scrape a URL and return structured data.
 
     Args:
         url: The URL to scrape.
-        respect_robots: If True, check robots.txt before scraping.
+        respect_robots: If True, check robots.txt before scraping (skipped
+                        when ``http_cache`` is offline).
+        robots: Robots cache to consult (defaults to the shared module cache).
+        http_cache: Optional response cache for conditional re-fetching.
+        max_page_bytes: Bytes of HTML read before the page is truncated.
+        links: If a list is given, the page's links (resolved against ``url``)
+               are appended to it; the result dict itself is unchanged.
+        retry: Retry policy for transient failures (defaults to the module policy).
+        breaker: Per-host circuit breaker (defaults to the shared module breaker).
+        pool: Keep-alive connection pool (defaults to the shared module pool).
 
     Returns:
-        A dict with keys: url, title, text, timestamp, error (optional).
+        A dict with keys: url, title, text, timestamp, error (optional),
+        truncated (optional, set when the page exceeded ``max_page_bytes``).
     """
     result = {"url": url, "title": "", "text": "", "timestamp": datetime.now().isoformat()}
 
-    if respect_robots and not is_allowed_by_robots(url):
+    if http_cache is not None and http_cache.offline:
+        respect_robots = False
+    if respect_robots and not is_allowed_by_robots(url, robots):
         result["error"] = f"Scraping not allowed by robots.txt for {url}"
         print(f"⚠️  {result['error']}")
         return result
 
-    try:
-        html = fetch_url(url)
-
-        # Extract title
-        title_match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
-        if title_match:
-            result["title"] = strip_html_tags(title_match.group(1)).strip()
-
-        result["text"] = strip_html_tags(html)
+    retry = retry or _RETRY_POLICY
+    breaker = breaker or _CIRCUIT_BREAKER
+    for attempt in range(retry.attempts):
+        if not breaker.allow(url):
+            result["error"] = f"Circuit open for {_host_key(url)}; skipped {url}"
+            print(f"⛔ {result['error']}")
+            break
+        try:
+            page = extract_html_text(iter_url(url, pool=pool, cache=http_cache), max_page_bytes, links is not None)
+        except Exception as exc:
+            breaker.record(url, exc)
+            delay = retry.delay(attempt, exc)
+            if delay is None:
+                result["error"] = str(exc)
+                print(f"❌ Error scraping {url}: {exc}")
+                break
+            print(f"🔁 Retrying {url} in {delay:.1f}s: {exc}")
+            time.sleep(delay)
+            continue
+        breaker.record(url)
+        if links is not None:
+            links.extend(urllib.parse.urljoin(url, href.strip()) for href in page["links"])
+        result["title"] = page["title"]
+        result["text"] = page["text"]
+        if page["truncated"]:
+            result["truncated"] = True
+            print(f"⚠️  Truncated {url} after {max_page_bytes} bytes")
         print(f"✅ Scraped URL: {url} ({len(result['text'])} chars)")
-    except Exception as exc:
-        result["error"] = str(exc)
-        print(f"❌ Error scraping {url}: {exc}")
+        break
 
     return result
 
 
-def scrape_project_files(root_dir: str, extensions: list = None) -> list:
+# ---------------------------------------------------------------------------
+# Concurrent URL scraping (asyncio)
+# ---------------------------------------------------------------------------
+
+class AsyncScraper:
     """
-    Walk a directory tree and extract content from source files.
+    Asyncio scraping engine with a global and a per-host concurrency limit.
+
+    Each URL goes through the same ``scrape_url`` path as a serial run (run on
+    a worker thread), so results have the same schema; at most ``concurrency``
+    scrapes are in flight overall and at most ``per_host`` against any one
+    origin. When robots.txt is respected, request starts per host are also
+    spaced by its ``Crawl-delay``/``Request-rate``. Semaphores are created
+    lazily inside the running event loop.
+    """
+
+    def __init__(self, concurrency: int = 8, per_host: int = 2, respect_robots: bool = True,
+                 robots: RobotsCache = None, http_cache: HTTPCache = None,
+                 max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES, retry: RetryPolicy = None,
+                 breaker: CircuitBreaker = None, pool: HTTPConnectionPool = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        # Offline runs never touch the network, robots.txt included
+        self.respect_robots = respect_robots and not (http_cache is not None and http_cache.offline)
+        self.robots = robots or _ROBOTS_CACHE
+        self.http_cache = http_cache
+        self.max_page_bytes = max_page_bytes
+        self.retry = retry
+        self.breaker = breaker
+        self.pool = pool
+        self._global = None
+        self._hosts = {}
+        self._next_slot = {}  # host key -> earliest start time of the next request
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        key = _host_key(url)
+        if key not in self._hosts:
+            self._hosts[key] = asyncio.Semaphore(self.per_host)
+        return self._hosts[key]
+
+    async def _wait_for_slot(self, url: str) -> None:
+        """Sleep until the host's robots.txt politeness interval allows another request."""
+        interval = await asyncio.to_thread(self.robots.min_interval, url)
+        if not interval:
+            return
+        key = _host_key(url)
+        now = time.monotonic()
+        start = max(now, self._next_slot.get(key, now))
+        self._next_slot[key] = start + interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def scrape(self, url: str, links: list = None) -> dict:
+        """Scrape one URL within the concurrency and politeness limits (``links`` as in ``scrape_url``)."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.concurrency)
+        async with self._host_semaphore(url):
+            if self.respect_robots:
+                await self._wait_for_slot(url)
+            async with self._global:
+                return await asyncio.to_thread(
+                    scrape_url, url, self.respect_robots, self.robots, self.http_cache, self.max_page_bytes,
+                    links, retry=self.retry, breaker=self.breaker, pool=self.pool,
+                )
+
+    async def scrape_all(self, urls: list) -> list:
+        """Scrape every URL concurrently; results are returned in input order."""
+        return await asyncio.gather(*(self.scrape(url) for url in urls))
+
+    async def as_completed(self, urls: list):
+        """Async generator yielding result dicts as each scrape finishes."""
+        for future in asyncio.as_completed([self.scrape(url) for url in urls]):
+            yield await future
+
+
+def scrape_urls(urls: list, concurrency: int = 8, per_host: int = 2, respect_robots: bool = True,
+                http_cache: HTTPCache = None, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+                pool: HTTPConnectionPool = None) -> list:
+    """
+    Scrape many URLs concurrently from synchronous code.
 
     Args:
-        root_dir: Root directory to scan.
-        extensions: List of file extensions to include (e.g. ['.cs', '.py']).
-                    Defaults to common source/config extensions.
+        urls: URLs to scrape.
+        concurrency: Maximum scrapes in flight overall.
+        per_host: Maximum scrapes in flight per scheme + host.
+        respect_robots: If True, check robots.txt before scraping.
+        http_cache: Optional response cache shared by all scrapes.
+        max_page_bytes: Bytes of HTML read per page before it is truncated.
+        pool: Keep-alive connection pool (defaults to the shared module pool).
 
     Returns:
-        List of dicts with keys: path, extension, content, size.
+        A list of ``scrape_url`` result dicts, in the same order as ``urls``.
     """
-    if extensions is None:
-        extensions = [".cs", ".py", ".json", ".md", ".yaml", ".yml", ".csproj", ".sln"]
+    if not urls:
+        return []
+    scraper = AsyncScraper(concurrency, per_host, respect_robots, http_cache=http_cache,
+                           max_page_bytes=max_page_bytes, pool=pool)
+    return asyncio.run(scraper.scrape_all(list(urls)))
 
-    results = []
-    root = Path(root_dir)
 
-    # Directories to skip
-    skip_dirs = {"bin", "obj", "node_modules", ".git", ".vs", ".vscode", "__pycache__"}
+def iter_async(make_generator):
+    """
+    Drive an async generator from synchronous code, yielding items as they arrive.
+
+    ``make_generator()`` is called inside a fresh event loop on a background
+    thread and its items are handed over through a queue; exceptions are
+    re-raised in the caller. Closing the iterator early stops the generator
+    at its next item.
+    """
+    items = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    async def _drain():
+        async for item in make_generator():
+            items.put(item)
+            if stop.is_set():
+                break
+
+    def _run():
+        try:
+            asyncio.run(_drain())
+        except BaseException as exc:
+            items.put(exc)
+        finally:
+            items.put(done)
+
+    thread = threading.Thread(target=_run, name="async-results", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_scrape_urls(urls: list, concurrency: int = 8, per_host: int = 2, respect_robots: bool = True,
+                     http_cache: HTTPCache = None, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+                     pool: HTTPConnectionPool = None):
+    """Like ``scrape_urls``, but yield each result as soon as its page completes (completion order)."""
+    if not urls:
+        return iter(())
+    scraper = AsyncScraper(concurrency, per_host, respect_robots, http_cache=http_cache,
+                           max_page_bytes=max_page_bytes, pool=pool)
+    return iter_async(lambda: scraper.as_completed(list(urls)))
+
+
+# ---------------------------------------------------------------------------
+# Breadth-first crawling
+# ---------------------------------------------------------------------------
+
+CRAWL_SCOPES = ("origin", "prefix")
+
+DEFAULT_CRAWL_DEPTH = 2
+
+# Links to these are never queued: they are not HTML pages
+_NON_HTML_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".pdf", ".zip", ".gz", ".tgz",
+    ".tar", ".7z", ".exe", ".msi", ".dmg", ".mp3", ".mp4", ".webm", ".woff", ".woff2", ".ttf",
+    ".css", ".js", ".json", ".xml",
+}
+
+
+def normalize_url(url: str, base: str = None) -> str:
+    """
+    Canonical form of a URL for crawl de-duplication, or None if it is not an http(s) URL.
+
+    Relative links are resolved against ``base``; scheme and host are
+    lowercased, default ports, credentials and fragments dropped, and dot
+    segments in the path resolved.
+    """
+    if base:
+        url = urllib.parse.urljoin(base, url.strip())
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    try:
+        host, port = parts.hostname, parts.port
+    except ValueError:
+        return None
+    if scheme not in ("http", "https") or not host:
+        return None
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, 80 if scheme == "http" else 443) else f"{host}:{port}"
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if path == ".":
+        path = "/"
+    elif parts.path.endswith("/") and not path.endswith("/"):
+        path += "/"
+    return urllib.parse.urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+def _scope_prefix(url: str, scope: str) -> str:
+    """URL prefix a crawl from ``url`` is confined to: its origin, or its directory."""
+    if scope == "origin":
+        return _host_key(url) + "/"
+    parts = urllib.parse.urlsplit(url)
+    directory = parts.path[:parts.path.rfind("/") + 1] or "/"
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc, directory, "", ""))
+
+
+class Crawler:
+    """
+    Bounded breadth-first crawl seeded from one or more URLs.
+
+    Discovered links are normalised (``normalize_url``), de-duplicated and kept
+    only if they fall within a seed's scope: its ``origin`` or its directory
+    ``prefix``. The frontier is a FIFO queue drained ``concurrency`` pages at
+    a time through an ``AsyncScraper``, so the per-host limits, robots.txt
+    rules and politeness delays of ``scrape_urls`` all apply; URLs disallowed
+    by robots.txt are skipped without counting towards ``max_pages``. Pages
+    deeper than ``max_depth`` links from a seed are not fetched. Results use
+    the ``scrape_url`` schema and are yielded as pages complete.
+    """
+
+    def __init__(self, seeds: list, max_depth: int = DEFAULT_CRAWL_DEPTH, max_pages: int = 100, scope: str = "prefix",
+                 scraper: AsyncScraper = None):
+        if scope not in CRAWL_SCOPES:
+            raise ValueError(f"scope must be one of {CRAWL_SCOPES}, got {scope!r}")
+        self.seeds = [url for url in (normalize_url(seed) for seed in seeds) if url]
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.scraper = scraper or AsyncScraper()
+        self.prefixes = sorted({_scope_prefix(seed, scope) for seed in self.seeds})
+
+    def in_scope(self, url: str) -> bool:
+        if os.path.splitext(urllib.parse.urlsplit(url).path)[1].lower() in _NON_HTML_EXTENSIONS:
+            return False
+        return any(url.startswith(prefix) for prefix in self.prefixes)
+
+    async def _fetch(self, url: str, depth: int) -> tuple:
+        links = []
+        result = await self.scraper.scrape(url, links)
+        return result, links, depth
+
+    async def crawl(self):
+        """Async generator yielding ``scrape_url`` result dicts as pages complete."""
+        seen = set(self.seeds)
+        frontier = deque((url, 0) for url in self.seeds)
+        pending = set()
+        started = 0
+        try:
+            while frontier or pending:
+                while frontier and len(pending) < self.scraper.concurrency and started < self.max_pages:
+                    url, depth = frontier.popleft()
+                    if self.scraper.respect_robots and not await asyncio.to_thread(self.scraper.robots.can_fetch, url):
+                        continue
+                    started += 1
+                    pending.add(asyncio.ensure_future(self._fetch(url, depth)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result, links, depth = task.result()
+                    yield result
+                    if depth >= self.max_depth:
+                        continue
+                    for link in links:
+                        link = normalize_url(link)
+                        if link and link not in seen and self.in_scope(link):
+                            seen.add(link)
+                            frontier.append((link, depth + 1))
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def crawl(seeds: list, max_depth: int = DEFAULT_CRAWL_DEPTH, max_pages: int = 100, scope: str = "prefix",
+          concurrency: int = 8, per_host: int = 2, respect_robots: bool = True,
+          http_cache: HTTPCache = None, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+          pool: HTTPConnectionPool = None):
+    """
+    Crawl from synchronous code, yielding result dicts as pages complete.
+
+    The crawl's event loop runs on a background thread (see ``iter_async``),
+    so the caller can write each page out before the crawl finishes.
+    Arguments are as for ``Crawler`` and ``scrape_urls``.
+    """
+    scraper = AsyncScraper(concurrency, per_host, respect_robots, http_cache=http_cache,
+                           max_page_bytes=max_page_bytes, pool=pool)
+    crawler = Crawler(seeds, max_depth, max_pages, scope, scraper)
+    return iter_async(crawler.crawl)
+
+
+# ---------------------------------------------------------------------------
+# Sitemap ingestion
+# ---------------------------------------------------------------------------
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Sitemap index nesting followed before giving up (guards against cycles)
+MAX_SITEMAP_DEPTH = 3
+
+
+def _local_name(tag: str) -> str:
+    """Element name without its XML namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_lastmod(value: str) -> datetime:
+    """Parse a W3C datetime ``lastmod`` as an aware UTC datetime, or None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _sitemap_chunks(chunks):
+    """Pass a sitemap body through, inflating it if it is a gzip file (``sitemap.xml.gz``)."""
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    body = itertools.chain([first], chunks)
+    if first.startswith(_GZIP_MAGIC):
+        return decode_content(body, "gzip")
+    return body
+
+
+def iter_sitemap_entries(chunks):
+    """
+    Stream ``<url>``/``<sitemap>`` entries out of a sitemap or sitemap index.
+
+    The XML is parsed incrementally with ``XMLPullParser`` and every finished
+    entry is cleared from the tree, so memory stays flat for sitemaps tens of
+    megabytes long. gzip-compressed sitemaps are detected and inflated.
+
+    Yields:
+        (kind, loc, lastmod) with kind ``"url"`` or ``"sitemap"`` and lastmod
+        an aware datetime or None.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    for chunk in _sitemap_chunks(chunks):
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+            if event != "end" or _local_name(elem.tag) not in ("url", "sitemap"):
+                continue
+            fields = {_local_name(child.tag): (child.text or "").strip() for child in elem}
+            if fields.get("loc"):
+                yield _local_name(elem.tag), fields["loc"], parse_lastmod(fields.get("lastmod"))
+            root.clear()
+    parser.close()
+
+
+def discover_sitemaps(site_url: str, robots: RobotsCache = None) -> list:
+    """Sitemaps for a site: those listed in robots.txt, else ``/sitemap.xml`` at its origin."""
+    return (robots or _ROBOTS_CACHE).sitemaps(site_url) or [_host_key(site_url) + "/sitemap.xml"]
+
+
+def sitemap_urls(sources: list, since: datetime = None, robots: RobotsCache = None,
+                 http_cache: HTTPCache = None, pool: HTTPConnectionPool = None):
+    """
+    Page URLs listed in sitemaps, optionally only those modified since ``since``.
+
+    Each source is a sitemap URL (path ending in ``.xml`` or ``.gz``) or a
+    site URL whose sitemaps are discovered via ``discover_sitemaps``. Sitemap
+    indexes are followed, skipping child sitemaps whose own ``lastmod`` is
+    older than ``since``; pages without a ``lastmod`` are always included.
+    Unreadable sitemaps are reported and skipped.
+
+    Yields:
+        Page URLs, de-duplicated, in sitemap order.
+    """
+    pending = deque()
+    for source in sources:
+        path = urllib.parse.urlsplit(source).path.lower()
+        if path.endswith((".xml", ".gz")):
+            pending.append((source, 0))
+        else:
+            pending.extend((sitemap, 0) for sitemap in discover_sitemaps(source, robots))
+
+    visited, emitted = set(), set()
+    while pending:
+        sitemap, depth = pending.popleft()
+        if sitemap in visited:
+            continue
+        visited.add(sitemap)
+        count = children = 0
+        try:
+            for kind, loc, lastmod in iter_sitemap_entries(iter_url(sitemap, pool=pool, cache=http_cache)):
+                if since is not None and lastmod is not None and lastmod < since:
+                    continue
+                if kind == "sitemap":
+                    if depth < MAX_SITEMAP_DEPTH:
+                        children += 1
+                        pending.append((loc, depth + 1))
+                elif loc not in emitted:
+                    emitted.add(loc)
+                    count += 1
+                    yield loc
+        except (OSError, ET.ParseError, zlib.error) as exc:
+            print(f"⚠️  Could not read sitemap {sitemap}: {exc}")
+            continue
+        print(f"🗺️  Sitemap {sitemap}: " + (f"{children} sitemap(s)" if children else f"{count} URL(s)"))
+
 
-    for file_path in sorted(root.rglob("*")):
-        if not file_path.is_file():
+class SitemapState:
+    """
+    Time of the last sitemap run, persisted so the next run can ask for
+    pages changed since then. ``mark()`` records the start of the current
+    run, so pages modified while it was running are picked up next time,
+    together with the pages that failed to scrape: their ``lastmod`` will not
+    move, so they are re-queued from ``failed`` instead.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = datetime.now(timezone.utc)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.last_run = parse_lastmod(state.get("last_run"))
+            self.failed = [url for url in state.get("failed", []) if isinstance(url, str)]
+        except (OSError, ValueError, AttributeError):
+            self.last_run = None
+            self.failed = []
+
+    def mark(self, failed: list = ()) -> None:
+        """Atomically record this run's start time and the pages that failed to scrape."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_run": self.started.isoformat(), "failed": sorted(failed)}, f)
+        os.replace(tmp_path, self.path)
+
+
+# ---------------------------------------------------------------------------
+# Near-duplicate detection (SimHash)
+# ---------------------------------------------------------------------------
+
+SIMHASH_BITS = 64
+
+# Words per shingle, and the fewest shingles a page needs to be fingerprinted
+SIMHASH_SHINGLE = 3
+SIMHASH_MIN_SHINGLES = 16
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of ``text`` over word 3-shingles weighted by frequency,
+    or None when the text is too short for a meaningful fingerprint.
+
+    Bit sums are accumulated one byte of each shingle hash at a time
+    (8 table updates per shingle instead of 64 bit tests).
+    """
+    words = _WORD_RE.findall(text.lower())
+    shingles = Counter(" ".join(words[i:i + SIMHASH_SHINGLE])
+                       for i in range(len(words) - SIMHASH_SHINGLE + 1))
+    if sum(shingles.values()) < SIMHASH_MIN_SHINGLES:
+        return None
+    tables = [[0] * 256 for _ in range(SIMHASH_BITS // 8)]
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest()
+        for table, byte in zip(tables, digest):
+            table[byte] += weight
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position, table in enumerate(tables):
+        for bit in range(8):
+            ones = sum(weight for value, weight in enumerate(table) if value >> bit & 1)
+            if 2 * ones > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+class SimHashIndex:
+    """
+    Banded index for Hamming-distance lookups over SimHash fingerprints.
+
+    Fingerprints are split into ``bands`` equal bit bands; by the pigeonhole
+    principle two fingerprints within ``threshold`` < ``bands`` bits of each
+    other agree exactly on at least one band, so a lookup only compares
+    against the entries sharing a band value instead of every entry.
+    """
+
+    def __init__(self, bands: int = 4, threshold: int = 3):
+        if threshold >= bands:
+            raise ValueError("threshold must be smaller than the number of bands")
+        self.threshold = threshold
+        self.width = SIMHASH_BITS // bands
+        self._mask = (1 << self.width) - 1
+        self._bands = [{} for _ in range(bands)]
+
+    def _keys(self, fingerprint: int):
+        for band in range(len(self._bands)):
+            yield band, fingerprint >> (band * self.width) & self._mask
+
+    def add(self, fingerprint: int, item) -> None:
+        for band, key in self._keys(fingerprint):
+            self._bands[band].setdefault(key, []).append((fingerprint, item))
+
+    def find(self, fingerprint: int):
+        """The first indexed item within ``threshold`` bits of ``fingerprint``, or None."""
+        for band, key in self._keys(fingerprint):
+            for other, item in self._bands[band].get(key, ()):
+                if (fingerprint ^ other).bit_count() <= self.threshold:
+                    return item
+        return None
+
+
+def iter_unique_results(results, threshold: int = 3):
+    """
+    Stream results, replacing near-duplicate pages with a stub record.
+
+    Pages (results with a ``url`` and ``text`` and no ``error``) are
+    fingerprinted with ``simhash``. A page within ``threshold`` bits of an
+    earlier page is not passed on in full: a ``{"url", "duplicate_of",
+    "timestamp"}`` stub naming the first copy is yielded instead, since that
+    copy may already have been written out. Other results pass through.
+    """
+    index = SimHashIndex(threshold=threshold)
+    collapsed = 0
+    for result in results:
+        fingerprint = None
+        if "url" in result and result.get("text") and not result.get("error"):
+            fingerprint = simhash(result["text"])
+        if fingerprint is not None:
+            original = index.find(fingerprint)
+            if original is not None:
+                collapsed += 1
+                yield {"url": result["url"], "duplicate_of": original, "timestamp": result.get("timestamp")}
+                continue
+            index.add(fingerprint, result["url"])
+        yield result
+    if collapsed:
+        print(f"🧬 Collapsed {collapsed} near-duplicate page(s)")
+
+
+def collapse_near_duplicates(results, threshold: int = 3) -> list:
+    """
+    Drop scraped pages whose text is a near-duplicate of an earlier page.
+
+    A page within ``threshold`` bits of a kept page is removed and its URL
+    appended to the kept page's ``alternate_urls``. Other results pass
+    through in order.
+    """
+    kept = []
+    by_url = {}
+    for result in iter_unique_results(results, threshold):
+        if "duplicate_of" in result:
+            by_url[result["duplicate_of"]].setdefault("alternate_urls", []).append(result["url"])
             continue
-        # Skip ignored directories
-        if any(part in skip_dirs for part in file_path.parts):
+        if "url" in result:
+            by_url.setdefault(result["url"], result)
+        kept.append(result)
+    return kept
+
+
+def iter_remote_results(urls: list = (), sitemaps: list = (), since: datetime = None,
+                        sitemap_state: SitemapState = None, crawl_depth: int = None, max_pages: int = 100,
+                        scope: str = "prefix", concurrency: int = 8, per_host: int = 2,
+                        http_cache: HTTPCache = None, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+                        pool: HTTPConnectionPool = None):
+    """
+    Stream every remote result of a run as pages complete.
+
+    ``urls`` are scraped (or, with ``crawl_depth``, crawl seeds), then the
+    sitemap pages not already scraped, filtered by ``since`` or else by the
+    last run in ``sitemap_state``; the state is marked once the sitemap
+    pages are done, keeping the ones that failed so the next run retries them.
+    Every request, sitemaps included, goes through ``pool`` (defaults to the
+    shared module pool).
+    """
+    scraped = set()
+    if urls:
+        if crawl_depth is not None:
+            print(f"🕸️  Crawling from {len(urls)} URL(s) (depth {crawl_depth}, up to {max_pages} pages)…")
+            source = crawl(urls, crawl_depth, max_pages, scope, concurrency, per_host,
+                           http_cache=http_cache, max_page_bytes=max_page_bytes, pool=pool)
+        else:
+            print(f"🌐 Scraping {len(urls)} URL(s)…")
+            source = iter_scrape_urls(urls, concurrency, per_host, http_cache=http_cache,
+                                      max_page_bytes=max_page_bytes, pool=pool)
+        for result in source:
+            scraped.add(result["url"])
+            yield result
+
+    if sitemaps:
+        if since is None and sitemap_state is not None:
+            since = sitemap_state.last_run
+        pages = [url for url in sitemap_urls(sitemaps, since, http_cache=http_cache, pool=pool) if url not in scraped]
+        print(f"🗺️  Scraping {len(pages)} sitemap page(s)" + (f" changed since {since.isoformat()}…" if since else "…"))
+        if sitemap_state is not None and sitemap_state.failed:
+            retry = [url for url in sitemap_state.failed if url not in scraped and url not in pages]
+            if retry:
+                print(f"🔁 Retrying {len(retry)} sitemap page(s) that failed last run")
+                pages.extend(retry)
+        failed = []
+        for result in iter_scrape_urls(pages, concurrency, per_host, http_cache=http_cache,
+                                       max_page_bytes=max_page_bytes, pool=pool):
+            if result.get("error"):
+                failed.append(result["url"])
+            yield result
+        if sitemap_state is not None:
+            sitemap_state.mark(failed)
+
+
+# ---------------------------------------------------------------------------
+# Local project scanning
+# ---------------------------------------------------------------------------
+
+DEFAULT_EXTENSIONS = [".cs", ".py", ".json", ".md", ".yaml", ".yml", ".csproj", ".sln"]
+
+# Directories to skip
+SKIP_DIRS = {"bin", "obj", "node_modules", ".git", ".vs", ".vscode", "__pycache__"}
+
+MANIFEST_VERSION = 2
+
+# Parallel reads: upper bound on bytes being read concurrently
+DEFAULT_MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+
+
+class ProjectFile:
+    """
+    Lazy record for a scanned file.
+
+    Only path and stat data (plus the SHA-256 of the bytes, once an
+    incremental scan has computed it) are held in memory. Content is read on demand:
+    ``mapped()`` exposes the raw bytes through a read-only ``mmap`` (regex
+    extractors can run bytes patterns directly over it), and ``content``
+    decodes a fresh ``str`` on every access without caching it. Item access
+    (``file["content"]``) mirrors the dicts returned by ``scrape_project_files``.
+    """
+
+    __slots__ = ("path", "full_path", "extension", "size", "mtime_ns", "sha256")
+
+    def __init__(self, path: str, full_path: str, extension: str, size: int, mtime_ns: int, sha256: str = None):
+        self.path = path
+        self.full_path = full_path
+        self.extension = extension
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+
+    def __repr__(self) -> str:
+        return f"ProjectFile({self.path!r}, {self.size} bytes)"
+
+    def __getitem__(self, key: str):
+        if key not in ("path", "full_path", "extension", "size", "mtime_ns", "sha256", "content"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @contextlib.contextmanager
+    def mapped(self):
+        """Yield the file's bytes as a read-only memory map (``b""`` for empty files)."""
+        with open(self.full_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap cannot map zero-length files
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield buf
+
+    @property
+    def content(self) -> str:
+        """Decoded file text, read from disk on each access."""
+        with self.mapped() as buf:
+            return decode_file_bytes(bytes(buf))
+
+
+@contextlib.contextmanager
+def file_bytes(file):
+    """Yield the raw bytes of a scanned file: memory-mapped for ``ProjectFile``, encoded for dicts."""
+    if isinstance(file, ProjectFile):
+        with file.mapped() as buf:
+            yield buf
+    else:
+        yield file["content"].encode("utf-8")
+
+
+def _list_dir(path: str, sort: bool) -> list:
+    """List a directory's entries, optionally sorted by name; unreadable directories yield nothing."""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return []
+    if sort:
+        entries.sort(key=lambda entry: entry.name)
+    return entries
+
+
+def iter_project_files(root_dir: str, extensions: list = None, sort: bool = False, skip_dirs: set = None):
+    """
+    Stream the source files under ``root_dir`` without materialising the tree.
+
+    Ignored directories (``SKIP_DIRS`` by default) are pruned before they are
+    descended into, so build output such as ``bin/``, ``obj/`` and
+    ``node_modules/`` is never listed.
+
+    Args:
+        root_dir: Root directory to walk.
+        extensions: File extensions to include. Defaults to ``DEFAULT_EXTENSIONS``.
+        sort: If True, yield files in the same order as ``sorted(Path(root_dir).rglob("*"))``.
+        skip_dirs: Directory names to prune. Defaults to ``SKIP_DIRS``.
+
+    Yields:
+        ``ProjectFile`` records; no file content is read.
+    """
+    wanted = {ext.lower() for ext in (DEFAULT_EXTENSIONS if extensions is None else extensions)}
+    skip = SKIP_DIRS if skip_dirs is None else set(skip_dirs)
+
+    # Depth-first walk; visiting children in name order reproduces the
+    # lexicographic ordering of sorted(rglob()) without a global sort.
+    stack = [(iter(_list_dir(root_dir, sort)), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
             continue
-        if file_path.suffix.lower() not in extensions:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in skip:
+                    stack.append((iter(_list_dir(entry.path, sort)), prefix + entry.name + os.sep))
+                continue
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension not in wanted or not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
             continue
+        yield ProjectFile(prefix + entry.name, entry.path, extension, stat.st_size, stat.st_mtime_ns)
+
+
+def iter_read_results(records, read, workers: int = 1, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+                      cost=lambda record: record.size):
+    """
+    Apply ``read`` to each record, optionally on a thread pool, preserving input order.
+
+    With ``workers`` > 1, reads are submitted ahead of the consumer until either
+    ``2 * workers`` reads are pending or the pending reads' ``cost`` (file size
+    by default) would exceed ``max_inflight_bytes``; the oldest read is then
+    awaited first. A single file larger than the budget is still read, alone.
+
+    Yields:
+        (record, value, error) tuples in input order; exactly one of value/error is set.
+    """
+    if workers <= 1:
+        for record in records:
+            try:
+                yield record, read(record), None
+            except Exception as exc:
+                yield record, None, exc
+        return
 
+    def _collect(item):
+        record, future, _ = item
         try:
-            content = read_local_file(str(file_path))
-            results.append({
-                "path": str(file_path.relative_to(root)),
-                "extension": file_path.suffix.lower(),
-                "content": content,
-                "size": len(content),
-            })
+            return record, future.result(), None
         except Exception as exc:
-            print(f"⚠️  Could not read {file_path}: {exc}")
+            return record, None, exc
+
+    pending = deque()
+    inflight = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            size = cost(record)
+            while pending and (len(pending) >= 2 * workers or inflight + size > max_inflight_bytes):
+                item = pending.popleft()
+                inflight -= item[2]
+                yield _collect(item)
+            pending.append((record, pool.submit(read, record), size))
+            inflight += size
+        while pending:
+            yield _collect(pending.popleft())
+
+
+def scrape_project_files(root_dir: str, extensions: list = None, manifest_path: str = None,
+                         workers: int = 1, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+                         lazy: bool = False) -> list:
+    """
+    Walk a directory tree and extract content from source files.
+
+    Args:
+        root_dir: Root directory to scan.
+        extensions: List of file extensions to include (e.g. ['.cs', '.py']).
+                    Defaults to common source/config extensions.
+        manifest_path: Optional path to a scan manifest. When given, the scan is
+                       incremental: only added/modified files are hashed, and
+                       lazy ``ProjectFile`` records (with ``sha256``) are returned.
+        workers: Number of reader threads (1 reads sequentially).
+        max_inflight_bytes: Cap on bytes being read concurrently when workers > 1.
+        lazy: If True, return ``ProjectFile`` records without reading any
+              content; extractors map each file only while processing it.
+
+    Returns:
+        List of dicts with keys: path, extension, content, size (bytes on
+        disk) and sha256 (of those bytes).
+    """
+    if lazy:
+        results = list(iter_project_files(root_dir, extensions, sort=True))
+        print(f"📂 Scanned {len(results)} files in {root_dir}")
+        return results
+
+    if manifest_path:
+        return scan_project_changes(root_dir, manifest_path, extensions, workers, max_inflight_bytes)["files"]
+
+    results = []
+    records = iter_project_files(root_dir, extensions, sort=True)
+    read = lambda record: _read_with_digest(record.full_path)
+
+    for record, entry, exc in iter_read_results(records, read, workers, max_inflight_bytes):
+        if exc is not None:
+            print(f"⚠️  Could not read {record.full_path}: {exc}")
+            continue
+        content, digest = entry
+        results.append({
+            "path": record.path,
+            "extension": record.extension,
+            "content": content,
+            "size": record.size,
+            "sha256": digest,
+        })
 
     print(f"📂 Scanned {len(results)} files in {root_dir}")
     return results
 
 
-def extract_aspire_metadata(project_files: list) -> dict:
+# ---------------------------------------------------------------------------
+# Incremental scanning (persistent file manifest)
+# ---------------------------------------------------------------------------
+
+def load_manifest(manifest_path: str) -> dict:
+    """Load a scan manifest, returning an empty one if it is missing, stale or unreadable."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and isinstance(manifest.get("files"), dict):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+def save_manifest(manifest: dict, manifest_path: str) -> None:
+    """Atomically write a scan manifest (temp file + rename)."""
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def _stat_unchanged(record: ProjectFile, old: dict) -> bool:
+    """True if a walked file still has the mtime and size recorded in its manifest entry."""
+    return bool(old) and old["mtime_ns"] == record.mtime_ns and old["size"] == record.size
+
+
+def _manifest_entry(record: ProjectFile, old: dict) -> dict:
+    """Return the manifest entry for a walked file, hashing it only if its stat key changed."""
+    if _stat_unchanged(record, old):
+        return old
+    digest = hashlib.sha256()
+    with open(record.full_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"mtime_ns": record.mtime_ns, "size": record.size, "sha256": digest.hexdigest()}
+
+
+def scan_project_changes(root_dir: str, manifest_path: str, extensions: list = None,
+                         workers: int = 1, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES) -> dict:
     """
-    Extract Aspire-specific metadata from scanned project files.
+    Incrementally scan a directory tree against a persistent manifest.
+
+    Each manifest entry is keyed by relative path and records mtime, size and
+    SHA-256 content hash; file contents are not stored. A file whose mtime and
+    size are unchanged is not opened at all, and a file that was touched but
+    has identical content is detected through its hash. Contents are read
+    later, lazily, by whoever consumes the returned records (extraction with a
+    ``MetadataCache`` skips unchanged files by hash without reading them).
 
-    Returns a dict with services, dependencies, resources, and endpoints.
+    Args:
+        root_dir: Root directory to scan.
+        manifest_path: Manifest file to read and update.
+        extensions: List of file extensions to include (see ``scrape_project_files``).
+        workers: Number of reader threads for files that need re-hashing.
+        max_inflight_bytes: Cap on bytes being read concurrently when workers > 1.
+
+    Returns:
+        A dict with keys: files (``ProjectFile`` records with ``sha256`` set),
+        added, modified, deleted (lists of relative paths) and unchanged (count).
     """
-    metadata = {
-        "services": [],
-        "resources": [],
-        "dependencies": [],
-        "endpoints": [],
-    }
+    previous = load_manifest(manifest_path)["files"]
+    entries = {}
+    changes = {"files": [], "added": [], "modified": [], "deleted": [], "unchanged": 0}
 
-    for file in project_files:
-        content = file["content"]
-        path = file["path"]
+    records = iter_project_files(root_dir, extensions, sort=True)
+    read = lambda record: _manifest_entry(record, previous.get(record.path))
 
-        # Detect AppHost Program.cs
-        if "AppHost" in path and path.endswith("Program.cs"):
-            active_lines = [l for l in content.splitlines() if not l.lstrip().startswith("//")]
-            active_content = "\n".join(active_lines)
-
-            # Services (AddProject) — deduplicated
-            seen_services = set()
-            for match in re.finditer(r'AddProject<Projects\.(\w+)>\("(\w+)"', active_content):
-                key = match.group(2)
-                if key not in seen_services:
-                    seen_services.add(key)
-                    metadata["services"].append({"class": match.group(1), "name": match.group(2)})
-
-            # Resources (AddRedis, AddSqlServer, etc.) — deduplicated
-            seen_resources = set()
-            for match in re.finditer(r'\.(Add(?:Redis|SqlServer|RabbitMQ|Postgres|MongoDB|Kafka|Azure\w*|Nats|MySql|Oracle))\("(\w+)"', active_content):
-                key = match.group(2)
-                if key not in seen_resources:
-                    seen_resources.add(key)
-                    metadata["resources"].append({"type": match.group(1), "name": match.group(2)})
-
-            # Build variable name → registered name mapping for dependency resolution
-            var_to_name: dict = {}
-            # AddProject variables: var apiService = builder.AddProject<...>("apiservice")
-            for m in re.finditer(r'var\s+(\w+)\s*=.*?AddProject<Projects\.\w+>\("(\w+)"', active_content):
-                var_to_name[m.group(1)] = m.group(2)
-            # Resource variables: var cache = builder.AddRedis("cache")
-            for m in re.finditer(r'var\s+(\w+)\s*=.*?\.Add(?:Redis|SqlServer|RabbitMQ|Postgres|MongoDB|Kafka|Azure\w*|Nats|MySql|Oracle)\("(\w+)"', active_content):
-                var_to_name[m.group(1)] = m.group(2)
-            # Database variables (may span multiple lines): .AddDatabase("productsDb")
-            for m in re.finditer(r'var\s+(\w+)\s*=', active_content):
-                var_name = m.group(1)
-                # Look ahead up to 5 lines for .AddDatabase(...)
-                snippet = active_content[m.start():m.start() + 300]
-                db_m = re.search(r'\.AddDatabase\("(\w+)"', snippet)
-                if db_m:
-                    db_name = db_m.group(1)
-                    var_to_name[var_name] = db_name
-                    if db_name not in seen_resources:
-                        seen_resources.add(db_name)
-                        metadata["resources"].append({"type": "AddDatabase", "name": db_name})
-
-            # Extract (from_service → to_resource/service) dependency edges
-            # Parse each AddProject chain and its WithReference calls
-            for m in re.finditer(
-                r'(?:var\s+\w+\s*=\s*)?builder\.AddProject<Projects\.\w+>\("(\w+)"(.*?)(?=builder\.|$)',
-                active_content,
-                re.DOTALL,
-            ):
-                svc_name = m.group(1)
-                chain = m.group(2)
-                for ref_m in re.finditer(r'\.WithReference\((\w+)\)', chain):
-                    dep_var = ref_m.group(1)
-                    dep_name = var_to_name.get(dep_var, dep_var)
-                    metadata["dependencies"].append({"from": svc_name, "to": dep_name})
-
-        # API endpoints (MapGet / MapPost / MapPut / MapDelete)
-        if path.endswith("Program.cs") and "AppHost" not in path:
-            for match in re.finditer(r'\.(MapGet|MapPost|MapPut|MapDelete)\("([^"]+)"', content):
-                metadata["endpoints"].append({"method": match.group(1).replace("Map", ""), "path": match.group(2), "file": path})
+    cost = lambda record: 0 if _stat_unchanged(record, previous.get(record.path)) else record.size
 
-    return metadata
+    for record, entry, exc in iter_read_results(records, read, workers, max_inflight_bytes, cost):
+        if exc is not None:
+            print(f"⚠️  Could not read {record.full_path}: {exc}")
+            continue
+
+        rel_path = record.path
+        old = previous.get(rel_path)
+        if old is None:
+            changes["added"].append(rel_path)
+        elif old["sha256"] != entry["sha256"]:
+            changes["modified"].append(rel_path)
+        else:
+            changes["unchanged"] += 1
+        entries[rel_path] = entry
+        record.sha256 = entry["sha256"]
+        changes["files"].append(record)
 
+    changes["deleted"] = sorted(set(previous) - set(entries))
+    save_manifest({"version": MANIFEST_VERSION, "files": entries}, manifest_path)
 
-def save_scrape_results(results: list, output_path: str) -> None:
-    """Save scrape results as JSON."""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    print(f"💾 Saved scrape results to {output_path}")
+    print(
+        f"📂 Scanned {len(changes['files'])} files in {root_dir} "
+        f"(+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['deleted'])}, "
+        f"{changes['unchanged']} unchanged)"
+    )
+    return changes
 
 
-def main():
-    """CLI entry point for the scraper."""
-    import argparse
+# ---------------------------------------------------------------------------
+# Project index (.csproj / .sln)
+# ---------------------------------------------------------------------------
 
-    parser = argparse.ArgumentParser(description="AgentCamp documentation scraper")
-    parser.add_argument("--url", help="URL to scrape (respects robots.txt)")
-    parser.add_argument("--project-dir", default="src", help="Local project directory to scan (default: src)")
-    parser.add_argument("--output", default="docs/scrape-results.json", help="Output JSON file path")
-    args = parser.parse_args()
+_SLN_PROJECT_RE = re.compile(rb'Project\("\{[^}]*\}"\)\s*=\s*"([^"]+)"\s*,\s*"([^"]+\.\w+proj)"')
 
-    all_results = []
-
-    # Scrape remote URL if provided
-    if args.url:
-        print(f"\n🌐 Scraping URL: {args.url}")
-        url_data = scrape_url(args.url)
-        all_results.append(url_data)
-
-    # Always scan local project files
-    project_root = os.path.join(os.path.dirname(__file__), args.project_dir)
-    if os.path.isdir(project_root):
-        print(f"\n📁 Scanning project files in: {project_root}")
-        project_files = scrape_project_files(project_root)
-        metadata = extract_aspire_metadata(project_files)
-        all_results.append({
-            "type": "project_scan",
-            "root": args.project_dir,
-            "file_count": len(project_files),
-            "metadata": metadata,
-            "timestamp": datetime.now().isoformat(),
-        })
-        print(f"🏗️  Found {len(metadata['services'])} services, {len(metadata['resources'])} resources, {len(metadata['endpoints'])} endpoints")
 
-    # Save results
-    output_path = os.path.join(os.path.dirname(__file__), args.output)
-    save_scrape_results(all_results, output_path)
+def aspire_type_name(project_name: str) -> str:
+    """The ``Projects.*`` class Aspire generates for a project (``AspireApp2.Web`` → ``AspireApp2_Web``)."""
+    return re.sub(r"\W", "_", project_name)
+
+
+class ProjectIndex:
+    """
+    Solution-wide index of .NET projects, built once per scan.
+
+    Maps project names to their ``.csproj`` paths (relative to the scan root,
+    ``/``-separated), ``ProjectReference`` edges, package references and the
+    ``Projects.*`` type names the AppHost uses, with dict lookups for each.
+    """
+
+    def __init__(self):
+        self.projects = {}   # name -> {"name", "path", "references", "packages", "type_name", "is_apphost"}
+        self.solutions = {}  # .sln path -> [project names]
+        self._by_path = {}
+        self._by_type = {}
+        self._by_dir = {}
+        self._dependents = {}
+
+    def add_file(self, file, buf) -> None:
+        """Index one scanned ``.csproj`` or ``.sln`` file given its bytes."""
+        if file["extension"] == ".csproj":
+            self.add_project(file["path"], bytes(buf))
+        else:
+            self.add_solution(file["path"], buf)
+
+    def _register(self, path: str) -> dict:
+        path = posixpath.normpath(path.replace("\\", "/"))
+        name = self._by_path.get(path)
+        if name is None:
+            name = posixpath.splitext(posixpath.basename(path))[0]
+            self.projects[name] = {
+                "name": name,
+                "path": path,
+                "references": [],
+                "packages": [],
+                "type_name": aspire_type_name(name),
+                "is_apphost": False,
+            }
+            self._by_path[path] = name
+            self._by_type[aspire_type_name(name)] = name
+            self._by_dir[posixpath.dirname(path)] = name
+        return self.projects[name]
+
+    def add_project(self, path: str, data: bytes) -> None:
+        """Index a ``.csproj``: its references, packages and whether it is an Aspire AppHost."""
+        project = self._register(path)
+        project_dir = posixpath.dirname(project["path"])
+        for element in ET.fromstring(data).iter():
+            tag = element.tag.rsplit("}", 1)[-1]
+            include = element.get("Include")
+            if tag == "ProjectReference" and include:
+                ref_path = posixpath.normpath(posixpath.join(project_dir, include.replace("\\", "/")))
+                ref_name = self._register(ref_path)["name"]
+                project["references"].append(ref_name)
+                self._dependents.setdefault(ref_name, []).append(project["name"])
+            elif tag == "PackageReference" and include:
+                version = element.get("Version") or element.findtext("{*}Version") or element.findtext("Version")
+                project["packages"].append({"name": include, "version": version})
+            elif tag == "Sdk" and element.get("Name") == "Aspire.AppHost.Sdk":
+                project["is_apphost"] = True
+            elif tag == "IsAspireHost" and (element.text or "").strip().lower() == "true":
+                project["is_apphost"] = True
+
+    def add_solution(self, path: str, buf) -> None:
+        """Index the projects listed in a ``.sln`` file."""
+        sln_dir = posixpath.dirname(path.replace("\\", "/"))
+        names = []
+        for match in _SLN_PROJECT_RE.finditer(buf):
+            rel = match.group(2).decode("utf-8", errors="replace").replace("\\", "/")
+            names.append(self._register(posixpath.join(sln_dir, rel))["name"])
+        self.solutions[posixpath.normpath(path.replace("\\", "/"))] = names
+
+    def project_for_type(self, type_name: str) -> dict:
+        """Look up a project by its ``Projects.*`` type name (with or without the prefix)."""
+        name = self._by_type.get(type_name.rsplit(".", 1)[-1])
+        return self.projects.get(name)
+
+    def project_for_file(self, path: str) -> dict:
+        """The project whose directory contains ``path`` (nearest enclosing project wins)."""
+        directory = posixpath.dirname(path.replace("\\", "/"))
+        while True:
+            name = self._by_dir.get(directory)
+            if name is not None:
+                return self.projects[name]
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
+
+    def dependents(self, name: str) -> list:
+        """Names of the projects that reference ``name``."""
+        return self._dependents.get(name, [])
+
+    def apphosts(self) -> list:
+        """The indexed Aspire AppHost projects."""
+        return [p for p in self.projects.values() if p["is_apphost"]]
+
+
+# ---------------------------------------------------------------------------
+# AppHost parsing (single pass over the fluent builder chains)
+# ---------------------------------------------------------------------------
+
+# C# tokens; comments and whitespace are matched so they can be skipped
+_CS_TOKEN_RE = re.compile(
+    rb"""
+      (?P<skip>\s+|//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<str>(?:\$@|@\$|@)"(?:[^"]|"")*"|\$?"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<num>\d[\w.]*)
+    | (?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_RESOURCE_METHOD_RE = re.compile(
+    r"Add(?:Redis|SqlServer|RabbitMQ|Postgres|MongoDB|Kafka|Azure\w*|Nats|MySql|Oracle"
+    r"|Container|Dockerfile|Valkey|Garnet|Elasticsearch|Qdrant|Milvus|Seq|Keycloak)"
+)
+
+# Executable apps registered without a Projects.* type
+_APP_METHODS = {"AddNpmApp", "AddNodeApp", "AddPythonApp", "AddUvicornApp", "AddExecutable"}
+
+_EDGE_METHODS = {"WithReference": "reference", "WaitFor": "wait"}
+
+
+def _tokenize_csharp(buf) -> list:
+    """Split C# source (bytes) into (kind, value) tokens, dropping comments and whitespace."""
+    return [(m.lastgroup, m.group()) for m in _CS_TOKEN_RE.finditer(buf) if m.lastgroup != "skip"]
+
+
+def _string_value(token: bytes) -> str:
+    """Return the contents of a C# string literal token."""
+    return token[token.index(b'"') + 1:-1].decode("utf-8", errors="replace")
+
+
+def _matching(tokens: list, start: int, open_tok: bytes, close_tok: bytes) -> int:
+    """Index of the token closing the bracket opened at ``start`` (or len(tokens) if unbalanced)."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        value = tokens[i][1]
+        if value == open_tok:
+            depth += 1
+        elif value == close_tok:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(tokens)
+
+
+# Tokens that can appear between the angle brackets of generic type arguments
+_GENERIC_PUNCT = {b".", b",", b"?", b"[", b"]", b"<", b">"}
+
+
+def _generic_close(tokens: list, start: int) -> int:
+    """
+    Index of the ``>`` closing generic arguments opened at ``start``, or None.
+
+    The ``<`` only counts as generic arguments when everything up to the
+    matching ``>`` is a type name and a ``(`` follows, so comparisons such
+    as ``args.Length < 3`` are not mistaken for ``.Method<T>(...)``.
+    """
+    depth = 0
+    for i in range(start, len(tokens)):
+        kind, value = tokens[i]
+        if kind != "ident" and value not in _GENERIC_PUNCT:
+            return None
+        if value == b"<":
+            depth += 1
+        elif value == b">":
+            depth -= 1
+            if depth == 0:
+                return i if i + 1 < len(tokens) and tokens[i + 1][1] == b"(" else None
+    return None
+
+
+def _iter_chain_calls(tokens: list):
+    """
+    Walk C# statements as fluent call chains in one linear pass.
+
+    Yields events as tuples:
+        ("root", stmt_var, root_ident) — a statement's chain starts at ``root_ident``
+        ("call", method, generic, args) — ``.method<generic>(args)``; args is the token slice
+        ("end", stmt_var, None, None) — statement boundary (``;``, ``{`` or ``}``)
+
+    ``stmt_var`` is the name declared by ``var x = ...`` (or None). Call
+    arguments are skipped as a unit, so lambdas and nested statements inside
+    them never break the enclosing chain and every token is visited once.
+    """
+    stmt_var = None
+    at_start = True
+    i, n = 0, len(tokens)
+    while i < n:
+        kind, value = tokens[i]
+
+        if value in (b";", b"{", b"}"):
+            yield "end", stmt_var, None, None
+            stmt_var, at_start = None, True
+            i += 1
+            continue
+
+        if at_start:
+            at_start = False
+            if value == b"var" and i + 2 < n and tokens[i + 1][0] == "ident" and tokens[i + 2][1] == b"=":
+                stmt_var = tokens[i + 1][1].decode("ascii")
+                at_start = True  # the chain root follows the '='
+                i += 3
+                continue
+            if kind == "ident":
+                yield "root", stmt_var, value.decode("ascii"), None
+                i += 1
+                continue
+
+        if value != b"." or i + 1 >= n or tokens[i + 1][0] != "ident":
+            i += 1
+            continue
+
+        method = tokens[i + 1][1].decode("ascii")
+        j = i + 2
+        generic = ""
+        if j < n and tokens[j][1] == b"<":
+            close = _generic_close(tokens, j)
+            if close is not None:
+                generic = b"".join(tok for _, tok in tokens[j + 1:close]).decode("ascii", errors="replace")
+                j = close + 1
+        if j >= n or tokens[j][1] != b"(":
+            i = j
+            continue
+
+        close = _matching(tokens, j, b"(", b")")
+        yield "call", method, generic, tokens[j + 1:close]
+        i = close + 1
+
+    yield "end", stmt_var, None, None
+
+
+def parse_apphost(buf) -> dict:
+    """
+    Parse an AppHost ``Program.cs`` in a single linear pass over its tokens.
+
+    Each statement is read as a fluent chain (``[var x =] root.Call(...).Call(...)``).
+    ``Add*<Projects.X>("name")`` registers a service (including
+    ``AddAzureFunctionsProject``), known ``Add*("name")`` calls register
+    resources and ``AddDatabase`` databases; the most recently registered
+    name is the chain's subject, which ``WithReference``/``WaitFor`` edges
+    start from. Call arguments are skipped as a whole, so each token is
+    visited once.
+
+    Args:
+        buf: File content as bytes (e.g. a memory map).
+
+    Returns:
+        A dict with services, resources, dependencies and variables (var name → registered name).
+    """
+    parsed = {"services": [], "resources": [], "dependencies": [], "variables": {}}
+    variables = parsed["variables"]
+    seen_services, seen_resources = set(), set()
+    subject = None
+
+    for event, a, b, args in _iter_chain_calls(_tokenize_csharp(buf)):
+        if event == "root":
+            subject = variables.get(b)
+            continue
+        if event == "end":
+            if a and subject:
+                variables[a] = subject
+            subject = None
+            continue
+
+        method, generic = a, b
+        arg_kind, arg = args[0] if args else (None, b"")
+        if arg_kind == "str" and method.startswith("Add"):
+            name = _string_value(arg)
+            if generic.startswith("Projects.") or method in _APP_METHODS:
+                if name not in seen_services:
+                    seen_services.add(name)
+                    service_class = generic[len("Projects."):] if generic else method[len("Add"):]
+                    parsed["services"].append({"class": service_class, "name": name, "type": method})
+                subject = name
+            elif method == "AddDatabase" or _RESOURCE_METHOD_RE.fullmatch(method):
+                if name not in seen_resources:
+                    seen_resources.add(name)
+                    parsed["resources"].append({"type": method, "name": name})
+                subject = name
+        elif arg_kind == "ident" and len(args) == 1 and method in _EDGE_METHODS and subject:
+            dep_var = arg.decode("ascii")
+            parsed["dependencies"].append({
+                "from": subject,
+                "to": variables.get(dep_var, dep_var),
+                "kind": _EDGE_METHODS[method],
+            })
+
+    return parsed
+
+
+# ---------------------------------------------------------------------------
+# Endpoint discovery (minimal APIs, route groups, controllers, Functions)
+# ---------------------------------------------------------------------------
+
+# Cheap literal prefilter: a .cs file containing none of these cannot declare
+# an endpoint, so it is ruled out with a few C-speed substring searches.
+_ENDPOINT_LITERALS = (b".Map", b"[Http", b"[Route", b"HttpTrigger")
+
+_MAP_METHODS = {
+    "MapGet": "Get",
+    "MapPost": "Post",
+    "MapPut": "Put",
+    "MapDelete": "Delete",
+    "MapPatch": "Patch",
+    "MapHealthChecks": "Get",
+}
+
+_HTTP_ATTRIBUTES = {
+    "HttpGet": "Get",
+    "HttpPost": "Post",
+    "HttpPut": "Put",
+    "HttpDelete": "Delete",
+    "HttpPatch": "Patch",
+}
+
+_HTTP_VERBS = {"get", "post", "put", "delete", "patch", "head", "options"}
+
+
+def _may_declare_endpoints(buf) -> bool:
+    return any(buf.find(literal) != -1 for literal in _ENDPOINT_LITERALS)
+
+
+def _join_route(prefix: str, route: str) -> str:
+    """Compose a group/controller prefix with a route template into a full route."""
+    if route.startswith("~/"):
+        return route[1:]
+    if route.startswith("/") and not prefix:
+        return route
+    parts = [part.strip("/") for part in (prefix, route) if part and part.strip("/")]
+    return "/" + "/".join(parts)
+
+
+def _minimal_api_endpoints(tokens: list, groups: dict = None) -> list:
+    """
+    ``Map*`` calls, composed with ``MapGroup`` prefixes from the chain or a group variable.
+
+    Call arguments are walked as well, so routes mapped inside a lambda
+    (``app.UseEndpoints(endpoints => { endpoints.MapGet(...); })``) are found;
+    group variables declared outside the lambda stay visible inside it.
+    """
+    endpoints = []
+    groups = {} if groups is None else groups  # var -> route prefix
+    prefix = ""
+    for event, a, b, args in _iter_chain_calls(tokens):
+        if event == "root":
+            prefix = groups.get(b, "")
+            continue
+        if event == "end":
+            if a and prefix:
+                groups[a] = prefix
+            prefix = ""
+            continue
+        if args and args[0][0] == "str":
+            method, route = a, _string_value(args[0][1])
+            if method == "MapGroup":
+                prefix = _join_route(prefix, route)
+            elif method in _MAP_METHODS:
+                endpoints.append({"method": _MAP_METHODS[method], "path": _join_route(prefix, route)})
+            elif method == "MapMethods":
+                for kind, value in args[1:]:
+                    verb = _string_value(value) if kind == "str" else ""
+                    if verb.lower() in _HTTP_VERBS:
+                        endpoints.append({"method": verb.capitalize(), "path": _join_route(prefix, route)})
+        if any(value == b"." for _, value in args):
+            endpoints.extend(_minimal_api_endpoints(args, groups))
+    return endpoints
+
+
+def _attribute_list(tokens: list, start: int) -> list:
+    """``(name, args)`` for each attribute in the ``[A, B(...)]`` list opened at ``start``."""
+    close = _matching(tokens, start, b"[", b"]")
+    attributes = []
+    i = start + 1
+    while i < close:
+        kind, value = tokens[i]
+        if kind != "ident":
+            i += 1
+            continue
+        args = []
+        j = i + 1
+        if j < close and tokens[j][1] == b"(":
+            end = _matching(tokens, j, b"(", b")")
+            args = tokens[j + 1:end]
+            j = end + 1
+        attributes.append((value.decode("ascii"), args))
+        # Skip to the next attribute of the list
+        while j < close and tokens[j][1] != b",":
+            j += 1
+        i = j + 1
+    return attributes
+
+
+def _attribute_endpoints(tokens: list) -> list:
+    """Controller actions (``[Route]`` + ``[Http*]``) and Azure Functions ``HttpTrigger``s."""
+    endpoints = []
+    pending_route = None
+    class_prefix = ""
+    function_name = None
+    n = len(tokens)
+    for i, (kind, value) in enumerate(tokens):
+        if value in (b"{", b"}", b";"):
+            pending_route = None
+            continue
+        if value == b"class" and i + 1 < n and tokens[i + 1][0] == "ident":
+            class_name = tokens[i + 1][1].decode("ascii")
+            controller = class_name[:-len("Controller")] if class_name.endswith("Controller") else class_name
+            class_prefix = (pending_route or "").replace("[controller]", controller)
+            pending_route = None
+            continue
+        if value != b"[" or i + 1 >= n or tokens[i + 1][0] != "ident":
+            continue
+
+        attributes = []
+        for name, args in _attribute_list(tokens, i):
+            template = _string_value(args[0][1]) if args and args[0][0] == "str" else None
+            attributes.append((name, args, template))
+        # Routes first, so a Route listed after an Http* attribute (``[HttpPost, Route("bulk")]``) applies to it
+        for name, args, template in attributes:
+            if name == "Route" and template is not None:
+                pending_route = template
+        for name, args, template in attributes:
+            if name in _HTTP_ATTRIBUTES:
+                route = template if template is not None else (pending_route or "")
+                endpoints.append({"method": _HTTP_ATTRIBUTES[name], "path": _join_route(class_prefix, route)})
+            elif name == "Function" and template is not None:
+                function_name = template
+            elif name == "HttpTrigger":
+                route = function_name or ""
+                for k in range(len(args) - 2):
+                    if args[k][1] == b"Route" and args[k + 1][1] == b"=" and args[k + 2][0] == "str":
+                        route = _string_value(args[k + 2][1])
+                verbs = [_string_value(v) for kind_, v in args if kind_ == "str"]
+                for verb in verbs:
+                    if verb.lower() in _HTTP_VERBS:
+                        endpoints.append({"method": verb.capitalize(), "path": _join_route("api", route)})
+    return endpoints
+
+
+def find_endpoints(buf) -> list:
+    """
+    Discover HTTP endpoints declared in a C# source file.
+
+    Files without any endpoint literal are rejected by a substring prefilter
+    before tokenizing. Otherwise one token list feeds both the minimal-API
+    chain walk (``MapGet``/``MapPost``/…, ``MapMethods``, ``MapHealthChecks``,
+    composed with ``MapGroup`` prefixes) and the attribute scan (controllers
+    and Azure Functions ``HttpTrigger``).
+
+    Returns:
+        A list of {"method", "path"} dicts.
+    """
+    if not _may_declare_endpoints(buf):
+        return []
+    tokens = _tokenize_csharp(buf)
+    return _minimal_api_endpoints(tokens) + _attribute_endpoints(tokens)
+
+
+METADATA_KEYS = ("services", "resources", "dependencies", "endpoints")
+
+# Bump when extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = 4
+
+
+class MetadataCache:
+    """
+    Persistent memo of per-file extraction results keyed by content hash.
+
+    Entries map ``<version>:<extractor>:<sha256>`` to the extracted fragment
+    and the time it was last used. On ``save()`` entries unused for
+    ``max_age_days`` are dropped, then the least recently used ones until at
+    most ``max_entries`` remain.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_age_days: float = 30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            if not isinstance(self.entries, dict):
+                self.entries = {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key: str) -> dict:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["used"] = time.time()
+        return entry["fragment"]
+
+    def put(self, key: str, fragment: dict) -> None:
+        self.entries[key] = {"fragment": fragment, "used": time.time()}
+
+    def __contains__(self, key: str) -> bool:
+        """Membership test that, unlike ``get``, counts neither a hit nor a miss."""
+        return key in self.entries
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond ``max_entries``."""
+        cutoff = time.time() - self.max_age
+        live = [(key, entry) for key, entry in self.entries.items() if entry.get("used", 0) >= cutoff]
+        live.sort(key=lambda item: item[1]["used"], reverse=True)
+        self.entries = dict(live[:self.max_entries])
+
+    def save(self) -> None:
+        """Evict, then atomically write the cache to disk."""
+        self.evict()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def merge_metadata(fragments) -> dict:
+    """Assemble per-file fragments into the metadata dict, de-duplicating services and resources by name."""
+    metadata = {key: [] for key in METADATA_KEYS}
+    seen = {"services": set(), "resources": set()}
+    for fragment in fragments:
+        if not fragment:
+            continue
+        for key in METADATA_KEYS:
+            for item in fragment.get(key, ()):
+                if key in seen:
+                    if item["name"] in seen[key]:
+                        continue
+                    seen[key].add(item["name"])
+                # Copy so later annotation never mutates cached fragments
+                metadata[key].append(dict(item))
+    return metadata
+
+
+def annotate_metadata(metadata: dict, index: ProjectIndex) -> dict:
+    """Attach project information from the index to merged metadata."""
+    for service in metadata["services"]:
+        project = index.project_for_type(service["class"])
+        service["project"] = project["path"] if project else None
+    for endpoint in metadata["endpoints"]:
+        project = index.project_for_file(endpoint["file"])
+        endpoint["project"] = project["name"] if project else None
+    apphosts = index.apphosts()
+    metadata["apphost"] = apphosts[0]["name"] if apphosts else None
+    metadata["projects"] = [
+        {key: project[key] for key in ("name", "path", "references", "packages")}
+        for project in index.projects.values()
+    ]
+    return metadata
+
+
+# ---------------------------------------------------------------------------
+# Streaming extraction stages
+# ---------------------------------------------------------------------------
+
+class Extractor:
+    """
+    A registered per-file extraction stage.
+
+    ``func(file, buf, context)`` receives the scanned file, its bytes (a
+    memory map for lazy records) and the per-run context dict (which holds the
+    ``ProjectIndex`` under ``"index"``). It returns a fragment dict with any of
+    ``METADATA_KEYS`` or None. Results of ``cacheable`` stages must depend on
+    the bytes alone, so they can be memoized by content hash.
+    """
+
+    __slots__ = ("name", "func", "extensions", "filenames", "path_pattern", "cacheable")
+
+    def __init__(self, name: str, func, extensions=(), filenames=(), path_pattern: str = None,
+                 cacheable: bool = True):
+        self.name = name
+        self.func = func
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.filenames = frozenset(filenames)
+        self.path_pattern = re.compile(path_pattern) if path_pattern else None
+        self.cacheable = cacheable
+
+    def __repr__(self) -> str:
+        return f"Extractor({self.name!r})"
+
+    def matches(self, path: str, extension: str) -> bool:
+        """True if this stage wants the file at ``path``."""
+        if extension in self.extensions or posixpath.basename(path.replace("\\", "/")) in self.filenames:
+            return True
+        return bool(self.path_pattern and self.path_pattern.search(path))
+
+
+# Registered stages, run in registration order for each file
+EXTRACTORS = []
+
+
+def register_extractor(name: str, func, extensions=(), filenames=(), path_pattern: str = None,
+                       cacheable: bool = True) -> Extractor:
+    """
+    Register (or replace, by name) a streaming extraction stage.
+
+    Args:
+        name: Unique stage name; also part of the memo cache key.
+        func: ``func(file, buf, context) -> fragment | None`` (see ``Extractor``).
+        extensions: File extensions the stage wants (e.g. ``[".cs"]``).
+        filenames: Exact file names the stage wants (e.g. ``["Program.cs"]``).
+        path_pattern: Regex searched against the relative path.
+        cacheable: Whether the fragment may be memoized by content hash.
+
+    Returns:
+        The registered ``Extractor``.
+    """
+    extractor = Extractor(name, func, extensions, filenames, path_pattern, cacheable)
+    EXTRACTORS[:] = [e for e in EXTRACTORS if e.name != name] + [extractor]
+    return extractor
+
+
+def _index_stage(file, buf, context: dict) -> None:
+    """Feed .csproj/.sln files into the run's ``ProjectIndex``."""
+    try:
+        context["index"].add_file(file, buf)
+    except ET.ParseError as exc:
+        print(f"⚠️  Could not index {file['path']}: {exc}")
+    return None
+
+
+def _is_apphost_source(buf) -> bool:
+    return buf.find(b"DistributedApplication.CreateBuilder") != -1
+
+
+def _apphost_stage(file, buf, context: dict) -> dict:
+    """Services, resources and dependency edges from an AppHost ``Program.cs``."""
+    if not _is_apphost_source(buf):
+        return None
+    apphost = parse_apphost(buf)
+    return {key: apphost[key] for key in ("services", "resources", "dependencies")}
+
+
+def _endpoint_stage(file, buf, context: dict) -> dict:
+    """HTTP endpoints declared in any non-AppHost C# file (see ``find_endpoints``)."""
+    if _is_apphost_source(buf):
+        return None
+    endpoints = find_endpoints(buf)
+    return {"endpoints": endpoints} if endpoints else None
+
+
+register_extractor("project-index", _index_stage, extensions=[".csproj", ".sln"], cacheable=False)
+register_extractor("apphost", _apphost_stage, filenames=["Program.cs"])
+register_extractor("endpoints", _endpoint_stage, extensions=[".cs"])
+
+
+def _cache_covers(file, matching: list, cache: MetadataCache) -> bool:
+    """True if every matching stage can be answered from the cache by the file's known hash."""
+    digest = file.get("sha256")
+    return bool(digest) and cache is not None and all(
+        extractor.cacheable and f"{EXTRACTOR_VERSION}:{extractor.name}:{digest}" in cache for extractor in matching
+    )
+
+
+def _file_fragments(files, extractors: list, cache: MetadataCache, context: dict, stats: dict,
+                    workers: int = 1, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES):
+    """
+    Stream each file once through the stages that want it, yielding fragments.
+
+    The file is opened (memory-mapped for lazy records) only if some stage
+    matches, shared by all of them, and released before the next file.
+    With ``workers`` > 1, lazy files that will actually be read are
+    prefetched on a thread pool through ``iter_read_results``, bounded by
+    ``max_inflight_bytes``; extraction itself stays in input order on the
+    calling thread. Endpoint fragments are stamped with the file path after
+    the cache lookup so cached fragments stay path-independent.
+    """
+    def plan(file):
+        stats["files"] += 1
+        matching = [e for e in extractors if e.matches(file["path"], file["extension"])]
+        prefetch = (workers > 1 and bool(matching) and isinstance(file, ProjectFile)
+                    and not _cache_covers(file, matching, cache))
+        return file, matching, prefetch
+
+    def prefetch(item):
+        file, _, wanted = item
+        if not wanted:
+            return None
+        with file.mapped() as buf:
+            return bytes(buf)
+
+    items = (plan(file) for file in files)
+    cost = lambda item: item[0].size if item[2] else 0
+    for (file, matching, _), data, exc in iter_read_results(items, prefetch, workers, max_inflight_bytes, cost):
+        path = file["path"]
+        if not matching:
+            continue
+        try:
+            if exc is not None:
+                raise exc
+            with contextlib.nullcontext(data) if data is not None else file_bytes(file) as buf:
+                digest = None
+                for extractor in matching:
+                    fragment = None
+                    if cache is not None and extractor.cacheable:
+                        if digest is None:
+                            digest = file.get("sha256") or hashlib.sha256(buf).hexdigest()
+                        key = f"{EXTRACTOR_VERSION}:{extractor.name}:{digest}"
+                        fragment = cache.get(key)
+                        if fragment is None:
+                            fragment = extractor.func(file, buf, context) or {}
+                            cache.put(key, fragment)
+                    else:
+                        fragment = extractor.func(file, buf, context)
+                    if fragment:
+                        stats["extracted"] += 1
+                        if fragment.get("endpoints"):
+                            fragment = dict(fragment, endpoints=[dict(e, file=path) for e in fragment["endpoints"]])
+                        yield fragment
+        except OSError as exc:
+            print(f"⚠️  Could not read {path}: {exc}")
+
+
+def stream_extract(files, cache: MetadataCache = None, extractors: list = None, workers: int = 1,
+                   max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES) -> tuple:
+    """
+    Extract Aspire metadata from a stream of scanned files in a single pass.
+
+    ``files`` may be any iterable of scan results (dicts, ``ProjectFile``
+    records or the ``iter_project_files`` generator itself); nothing is
+    retained per file except its small metadata fragment, so memory stays
+    flat as the tree grows.
+
+    Args:
+        files: Iterable of scanned files.
+        cache: Optional ``MetadataCache`` memoizing cacheable stages by content hash.
+        extractors: Stages to run. Defaults to the registered ``EXTRACTORS``.
+        workers: Reader threads prefetching lazy files ahead of extraction (1 reads inline).
+        max_inflight_bytes: Cap on prefetched bytes not yet extracted when workers > 1.
+
+    Returns:
+        A (metadata, stats) tuple; stats counts files seen and fragments extracted.
+    """
+    context = {"index": ProjectIndex()}
+    stats = {"files": 0, "extracted": 0}
+    stages = EXTRACTORS if extractors is None else extractors
+    fragments = _file_fragments(files, stages, cache, context, stats, workers, max_inflight_bytes)
+    metadata = merge_metadata(fragments)
+    return annotate_metadata(metadata, context["index"]), stats
+
+
+def extract_aspire_metadata(project_files: list, cache: MetadataCache = None, workers: int = 1) -> dict:
+    """
+    Extract Aspire-specific metadata from scanned project files.
+
+    Accepts the dicts returned by ``scrape_project_files`` or lazy
+    ``ProjectFile`` records; lazy files are only read while being matched.
+    An optional ``MetadataCache`` memoizes each file's fragment by content
+    hash, so unchanged files are not re-parsed. ``workers`` prefetches lazy
+    files in parallel. See ``stream_extract``.
+
+    Returns a dict with services, dependencies, resources, endpoints, projects and apphost.
+    """
+    return stream_extract(project_files, cache, workers=workers)[0]
+
+
+# ---------------------------------------------------------------------------
+# Chunking
+# ---------------------------------------------------------------------------
+
+# Upper bound on the UTF-8 size of one chunk
+DEFAULT_CHUNK_BYTES = 4096
+
+# A block whose CRC has these bits clear may end a chunk once it is a quarter full
+_CHUNK_BOUNDARY_MASK = 0x3
+
+_FENCE_RE = re.compile(r"[ \t]*(`{3,}|~{3,})")
+
+
+def _iter_blocks(text: str):
+    """
+    Split text into paragraphs: runs of lines ending with blank lines.
+
+    Fenced code blocks (``` or ~~~) are never split at their inner blank lines.
+    Blocks are contiguous, so joining them gives back ``text``.
+    """
+    block = []
+    fence = None
+    pending_end = False
+    for line in text.splitlines(keepends=True):
+        blank = not line.strip()
+        if pending_end and not blank:
+            yield "".join(block)
+            block = []
+            pending_end = False
+        block.append(line)
+        opener = _FENCE_RE.match(line)
+        if opener:
+            marker = opener.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        if blank and fence is None and len(block) > 1:
+            pending_end = True
+    if block:
+        yield "".join(block)
+
+
+def _split_oversized(block: str, max_bytes: int):
+    """Cut a block larger than ``max_bytes`` at line ends, then at spaces, then anywhere."""
+    piece, size = [], 0
+    for line in block.splitlines(keepends=True):
+        line_size = len(line.encode("utf-8"))
+        if piece and size + line_size > max_bytes:
+            yield "".join(piece)
+            piece, size = [], 0
+        while line_size > max_bytes:
+            head = line.encode("utf-8")[:max_bytes].decode("utf-8", "ignore")
+            cut = head.rfind(" ") + 1
+            head = head[:cut] if cut > len(head) // 2 else head
+            yield head
+            line = line[len(head):]
+            line_size = len(line.encode("utf-8"))
+        piece.append(line)
+        size += line_size
+    if piece:
+        yield "".join(piece)
+
+
+def iter_text_chunks(text: str, source: str = "", max_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Split text into size-bounded chunks along paragraph and code-block boundaries.
+
+    Chunk boundaries are content-defined: besides closing a chunk when the next
+    paragraph would overflow it, a chunk ends after any paragraph whose CRC
+    matches ``_CHUNK_BOUNDARY_MASK``. An edit therefore only changes the chunks
+    around it, and the rest keep their IDs and offsets relative to each other.
+    Paragraphs larger than ``max_bytes`` are cut at line ends or spaces.
+
+    Args:
+        text: Text to split (page text or decoded file content).
+        source: URL or relative path; part of each chunk's ID.
+        max_bytes: Maximum UTF-8 size of a chunk.
+
+    Yields:
+        Dicts with keys: id (16 hex characters, derived from ``source`` and the
+        chunk's content), index, start and end (byte offsets into the UTF-8
+        encoded text), sha256 and text. Chunks are contiguous and joining
+        their texts gives back ``text``.
+    """
+    source_key = source.encode("utf-8") + b"\0"
+    seen = Counter()
+    parts, size, start, index = [], 0, 0, 0
+
+    def flush():
+        chunk = "".join(parts)
+        data = chunk.encode("utf-8")
+        chunk_id = hashlib.blake2b(source_key + data, digest_size=8).hexdigest()
+        seen[chunk_id] += 1
+        if seen[chunk_id] > 1:
+            chunk_id = f"{chunk_id}-{seen[chunk_id]}"
+        return {
+            "id": chunk_id,
+            "index": index,
+            "start": start,
+            "end": start + len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "text": chunk,
+        }
+
+    for block in _iter_blocks(text):
+        block_size = len(block.encode("utf-8"))
+        pieces = _split_oversized(block, max_bytes) if block_size > max_bytes else (block,)
+        for piece in pieces:
+            piece_size = len(piece.encode("utf-8"))
+            if parts and size + piece_size > max_bytes:
+                yield flush()
+                parts, start, size, index = [], start + size, 0, index + 1
+            parts.append(piece)
+            size += piece_size
+        if size >= max_bytes // 4 and not zlib.crc32(block.encode("utf-8")) & _CHUNK_BOUNDARY_MASK:
+            yield flush()
+            parts, start, size, index = [], start + size, 0, index + 1
+    if parts:
+        yield flush()
+
+
+def iter_result_chunks(result: dict, max_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Stream a scrape result as a header record followed by its chunk records.
+
+    The header is the result without ``text``, plus ``chunk_count`` and
+    ``text_sha256``; each chunk becomes ``{"type": "chunk", "source": url, ...}``
+    (see ``iter_text_chunks``). Results without inline text pass through as is.
+    """
+    text = result.get("text")
+    if "url" not in result or not isinstance(text, str):
+        yield result
+        return
+    chunks = list(iter_text_chunks(text, result["url"], max_bytes))
+    header = {key: value for key, value in result.items() if key != "text"}
+    header["chunk_count"] = len(chunks)
+    header["text_sha256"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    yield header
+    for chunk in chunks:
+        yield {"type": "chunk", "source": result["url"], **chunk}
+
+
+def iter_file_chunks(files, max_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Stream scanned project files as ``file`` records followed by their chunk records.
+
+    Accepts ``ProjectFile`` records or scan dicts; each file is read once and
+    only its own chunks are held in memory.
+    """
+    for file in files:
+        try:
+            content = file["content"]
+        except OSError as e:
+            print(f"⚠️  Could not chunk {file['path']}: {e}")
+            continue
+        chunks = list(iter_text_chunks(content, file["path"], max_bytes))
+        yield {
+            "type": "file",
+            "path": file["path"],
+            "extension": file.get("extension"),
+            "size": len(content.encode("utf-8")),
+            "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            "chunk_count": len(chunks),
+        }
+        for chunk in chunks:
+            yield {"type": "chunk", "source": file["path"], **chunk}
+
+
+# ---------------------------------------------------------------------------
+# Result output
+# ---------------------------------------------------------------------------
+
+# Output paths with these extensions are written as JSON Lines (one record per line)
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# Compression codecs, chosen by the output path's final extension
+OUTPUT_CODECS = {".gz": gzip, ".xz": lzma}
+
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+# Top-level string fields moved to the blob store once longer than its threshold
+BLOB_FIELDS = ("text", "content")
+
+
+def _split_codec(path: str) -> tuple:
+    """(codec module or None, path without the codec extension)."""
+    root, ext = os.path.splitext(str(path))
+    codec = OUTPUT_CODECS.get(ext.lower())
+    return (codec, root) if codec else (None, str(path))
+
+
+def is_ndjson_path(path: str) -> bool:
+    return _split_codec(path)[1].lower().endswith(NDJSON_EXTENSIONS)
+
+
+def _open_results(path: str, mode: str):
+    """Open a results file as text, compressed or not; reads detect the codec from magic bytes."""
+    if "r" in mode:
+        with open(path, "rb") as f:
+            magic = f.read(len(_XZ_MAGIC))
+        codec = gzip if magic.startswith(_GZIP_MAGIC) else lzma if magic.startswith(_XZ_MAGIC) else None
+    else:
+        codec = _split_codec(path)[0]
+    if codec is None:
+        return open(path, mode, encoding="utf-8")
+    return codec.open(path, mode + "t", encoding="utf-8")
+
+
+class BlobStore:
+    """
+    Content-addressed store for large text fields of scrape results.
+
+    Strings longer than ``threshold`` characters are written once to
+    ``<directory>/<sha[:2]>/<sha256>.gz`` and replaced in the record by
+    ``{"$blob": "<sha256>"}``. Unchanged pages and files therefore cost one
+    reference per run instead of another copy of their text, and the blobs
+    of earlier runs are reused as they are.
+    """
+
+    def __init__(self, directory: str, threshold: int = 4096):
+        self.directory = str(directory)
+        self.threshold = threshold
+        self.written = 0
+        self.reused = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + ".gz")
+
+    def put(self, text: str) -> str:
+        """Store ``text`` unless already present; returns its sha256 hex digest."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            self.reused += 1
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(data, mtime=0))
+        os.replace(tmp_path, path)
+        self.written += 1
+        return digest
+
+    def get(self, digest: str) -> str:
+        with open(self._path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def externalize(self, record: dict) -> dict:
+        """Copy of ``record`` with its large ``BLOB_FIELDS`` replaced by blob references."""
+        large = [key for key in BLOB_FIELDS
+                 if isinstance(record.get(key), str) and len(record[key]) > self.threshold]
+        if not large:
+            return record
+        record = dict(record)
+        for key in large:
+            record[key] = {"$blob": self.put(record[key])}
+        return record
+
+    def resolve(self, record: dict) -> dict:
+        """Inverse of ``externalize``: blob references replaced by their text."""
+        refs = [key for key in BLOB_FIELDS if isinstance(record.get(key), dict) and "$blob" in record[key]]
+        for key in refs:
+            record[key] = self.get(record[key]["$blob"])
+        return record
+
+
+class ResultWriter:
+    """
+    Incremental, atomic writer for scrape results.
+
+    Each record is serialised as soon as it is written, so memory stays flat
+    whatever the number of results. NDJSON puts one compact JSON document on
+    each line; the JSON format writes the same indented array as
+    ``json.dump(results, indent=2)``, element by element, or a single-line
+    array when ``compact``. A ``.gz``/``.xz`` suffix compresses the output
+    (``results.ndjson.gz``), and with a ``blobs`` store large text fields
+    are written out of line. Output goes to ``<path>.partial`` and is renamed
+    over ``path`` on ``close()``; the final path never holds a half-written
+    file. Uncompressed output is flushed every ``flush_every`` records so a
+    consumer can follow the partial file (flushing a compressor would cost
+    ratio, so compressed output is not). Used as a context manager, an
+    exception discards the partial file.
+    """
+
+    def __init__(self, output_path: str, ndjson: bool = None, flush_every: int = 1, compact: bool = False,
+                 blobs: BlobStore = None):
+        self.output_path = str(output_path)
+        self.ndjson = is_ndjson_path(self.output_path) if ndjson is None else ndjson
+        self.compressed = _split_codec(self.output_path)[0] is not None
+        self.flush_every = flush_every
+        self.compact = compact
+        self.blobs = blobs
+        self.count = 0
+        self.partial_path = f"{self.output_path}.partial"
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        codec = _split_codec(self.output_path)[0]
+        if codec is None:
+            self._file = open(self.partial_path, "w", encoding="utf-8")
+        else:
+            self._file = codec.open(self.partial_path, "wt", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        if self.blobs is not None:
+            record = self.blobs.externalize(record)
+        if self.ndjson:
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        elif self.compact:
+            self._file.write("[" if self.count == 0 else ",")
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        else:
+            self._file.write("[\n  " if self.count == 0 else ",\n  ")
+            self._file.write(json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        self.count += 1
+        if not self.compressed and self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Finish the file and atomically move it into place."""
+        if not self.ndjson:
+            if not self.count:
+                self._file.write("[]")
+            else:
+                self._file.write("]" if self.compact else "\n]")
+        self._file.close()
+        os.replace(self.partial_path, self.output_path)
+
+    def abort(self) -> None:
+        self._file.close()
+        with contextlib.suppress(OSError):
+            os.remove(self.partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_scrape_results(results, output_path: str, compact: bool = False, blobs: BlobStore = None) -> int:
+    """
+    Save scrape results, streaming them from any iterable; returns the record count.
+
+    Paths ending in ``.ndjson``/``.jsonl`` get JSON Lines, anything else a
+    JSON array; a further ``.gz``/``.xz`` compresses it (see ``ResultWriter``).
+    """
+    with ResultWriter(output_path, compact=compact, blobs=blobs) as writer:
+        for record in results:
+            writer.write(record)
+    print(f"💾 Saved {writer.count} scrape results to {output_path}")
+    return writer.count
+
+
+def results_path(path: str, ndjson: bool = False, codec: str = None) -> str:
+    """
+    Results file name for the output options shared by both CLIs.
+
+    ``ndjson`` swaps a ``.json`` extension for ``.ndjson`` (paths already
+    ending in ``.ndjson``/``.jsonl`` are kept) and ``codec`` (``"gz"`` or
+    ``"xz"``) replaces or adds the compression extension.
+    """
+    root, ext = os.path.splitext(str(path))
+    if ext.lower() not in OUTPUT_CODECS:
+        root, ext = str(path), ""
+    if ndjson and not root.lower().endswith(NDJSON_EXTENSIONS):
+        stem, suffix = os.path.splitext(root)
+        root = (stem if suffix.lower() == ".json" else root) + ".ndjson"
+    return root + (f".{codec}" if codec else ext)
+
+
+def write_remote_results(results, writer: ResultWriter, run=None, search_index=None,
+                         chunk_bytes: int = None, keep_duplicates: bool = False) -> None:
+    """
+    Write remote results as they arrive, recording each page along the way.
+
+    Args:
+        results: ``scrape_url`` result dicts, e.g. from ``iter_remote_results``.
+        writer: Destination. Near-duplicates become ``duplicate_of`` stubs in
+            JSON Lines output and are folded into ``alternate_urls`` otherwise.
+        run: Optional ``scrape_store.RunRecorder`` each page is added to.
+        search_index: Optional ``search_index.SearchIndex`` each page is added to.
+        chunk_bytes: If set, pages are written as chunk records of at most this size.
+        keep_duplicates: Write near-duplicate pages as they are.
+    """
+    if not keep_duplicates:
+        # A JSON array is written at the end anyway, so duplicates can be folded into alternate_urls
+        results = iter_unique_results(results) if writer.ndjson else collapse_near_duplicates(results)
+    for result in results:
+        if run is not None:
+            run.add_page(result)
+        if search_index is not None:
+            search_index.add_page(result)
+        if chunk_bytes:
+            for record in iter_result_chunks(result, chunk_bytes):
+                writer.write(record)
+        else:
+            writer.write(result)
+
+
+def iter_scrape_results(path: str, blobs: BlobStore = None):
+    """
+    Stream the records of a saved results file, whatever its format.
+
+    gzip/xz compression is detected from the file's magic bytes and JSON
+    Lines vs. a JSON array from its first character; JSON Lines are read one
+    line at a time, an array is loaded whole. Blob references are resolved
+    from ``blobs``, or from a ``blobs/`` directory next to the file if it
+    exists; otherwise they are left in place.
+
+    The ``<path>.partial`` file of a run still in progress can be read too
+    (uncompressed JSON Lines only): iteration stops at the current end of the
+    file, dropping a last line that is still being written.
+    """
+    if blobs is None:
+        blob_dir = os.path.join(os.path.dirname(str(path)), "blobs")
+        blobs = BlobStore(blob_dir) if os.path.isdir(blob_dir) else None
+    resolve = blobs.resolve if blobs is not None else (lambda record: record)
+    with _open_results(path, "r") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        if head == "[":
+            f.seek(0)
+            for record in json.load(f):
+                yield resolve(record)
+            return
+        f.seek(0)
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if line.endswith("\n"):
+                    raise
+                return  # torn last line of a file still being written
+            yield resolve(record)
+
+
+def main():
+    """CLI entry point for the scraper."""
+    import argparse
+    from scrape_store import ScrapeStore
+    from search_index import SearchIndex
+
+    parser = argparse.ArgumentParser(description="AgentCamp documentation scraper")
+    parser.add_argument("--url", action="append", default=[],
+                        help="URL to scrape (can be repeated; respects robots.txt)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent URL scrapes (default: 8)")
+    parser.add_argument("--per-host", type=int, default=2, help="Maximum concurrent scrapes per host (default: 2)")
+    parser.add_argument("--project-dir", default="src", help="Local project directory to scan (default: src)")
+    parser.add_argument("--output", default="docs/scrape-results.json",
+                        help="Output file path; .ndjson/.jsonl writes JSON Lines, a further .gz/.xz compresses it")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Write JSON Lines (.ndjson), streamed as results arrive")
+    parser.add_argument("--output-codec", choices=("gz", "xz"), help="Compress the output file (.gz / .xz)")
+    parser.add_argument("--compact", action="store_true", help="Write a JSON array output without indentation")
+    parser.add_argument("--blobs", nargs="?", const="", metavar="DIR",
+                        help="Store large text fields once, content-addressed, in DIR (default: blobs/ next to the output)")
+    parser.add_argument("--store", help="SQLite database to append this run to, for queries across runs")
+    parser.add_argument("--index", help="BM25 search index to update with project files and page texts")
+    parser.add_argument("--chunk", type=int, nargs="?", const=DEFAULT_CHUNK_BYTES, metavar="BYTES",
+                        help=f"Write page texts and project files as chunk records (default: {DEFAULT_CHUNK_BYTES} bytes)")
+    parser.add_argument("--manifest", help="Scan manifest path; enables incremental scanning of unchanged files")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel file reader threads (default: 1)")
+    parser.add_argument("--metadata-cache", help="Metadata cache path; memoizes per-file extraction by content hash")
+    parser.add_argument("--http-cache", nargs="?", const="", metavar="DIR",
+                        help="Cache responses in DIR (default: .http-cache/ next to the output) and re-fetch them "
+                             "conditionally (ETag/Last-Modified)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve URLs only from the HTTP cache, never the network (implies --http-cache)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"Idle keep-alive connections kept per host (default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f"Seconds before an idle keep-alive connection is dropped (default: {DEFAULT_IDLE_TIMEOUT:g})")
+    parser.add_argument("--max-page-bytes", type=int, default=DEFAULT_MAX_PAGE_BYTES,
+                        help=f"Truncate pages after this many bytes of HTML (default: {DEFAULT_MAX_PAGE_BYTES})")
+    parser.add_argument("--sitemap", action="append", default=[],
+                        help="Sitemap URL, or site URL whose sitemaps are found via robots.txt (can be repeated)")
+    parser.add_argument("--since", help="Only scrape sitemap pages modified after this ISO date")
+    parser.add_argument("--sitemap-state", help="File recording the last sitemap run; its time is the default --since")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Keep near-duplicate pages instead of collapsing them into alternate_urls")
+    parser.add_argument("--crawl", type=int, nargs="?", const=DEFAULT_CRAWL_DEPTH, metavar="DEPTH",
+                        help=f"Crawl breadth-first from the --url seeds, up to DEPTH links deep (default: {DEFAULT_CRAWL_DEPTH})")
+    parser.add_argument("--max-pages", type=int, default=100, help="Crawl: maximum pages fetched (default: 100)")
+    parser.add_argument("--scope", choices=CRAWL_SCOPES, default="prefix",
+                        help="Crawl: stay within each seed's directory (prefix) or host (origin) (default: prefix)")
+    args = parser.parse_args()
+
+    since = parse_lastmod(args.since)
+    if args.since and since is None:
+        parser.error(f"--since: not an ISO date: {args.since}")
+    if args.chunk is not None and args.chunk < 64:
+        parser.error("--chunk: chunks must allow at least 64 bytes")
+    output_path = results_path(os.path.join(os.path.dirname(__file__), args.output), args.ndjson, args.output_codec)
+    output_dir = os.path.dirname(output_path)
+
+    blobs = None
+    if args.blobs is not None:
+        blobs = BlobStore(os.path.join(os.path.dirname(__file__), args.blobs) if args.blobs else
+                          os.path.join(output_dir, "blobs"))
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(ResultWriter(output_path, compact=args.compact, blobs=blobs))
+        run = None
+        if args.store:
+            store = stack.enter_context(ScrapeStore(os.path.join(os.path.dirname(__file__), args.store)))
+            run = stack.enter_context(store.run(root=args.project_dir))
+        search_index = None
+        if args.index:
+            search_index = stack.enter_context(SearchIndex(os.path.join(os.path.dirname(__file__), args.index)))
+            stack.callback(search_index.commit)
+
+        # Remote URLs, crawls and sitemap pages, written as they complete
+        if args.url or args.sitemap:
+            http_cache = None
+            if args.http_cache is not None or args.offline:
+                cache_dir = (os.path.join(os.path.dirname(__file__), args.http_cache) if args.http_cache else
+                             os.path.join(output_dir, ".http-cache"))
+                http_cache = HTTPCache(cache_dir, offline=args.offline)
+            pool = HTTPConnectionPool(args.pool_size, args.idle_timeout)
+            stack.callback(pool.close)
+            state = None
+            if args.sitemap_state:
+                state = SitemapState(os.path.join(os.path.dirname(__file__), args.sitemap_state))
+            remote = iter_remote_results(
+                args.url, args.sitemap, since, state,
+                crawl_depth=args.crawl, max_pages=args.max_pages, scope=args.scope,
+                concurrency=args.concurrency, per_host=args.per_host, http_cache=http_cache,
+                max_page_bytes=args.max_page_bytes, pool=pool,
+            )
+            write_remote_results(remote, writer, run, search_index, args.chunk, args.keep_duplicates)
+            if http_cache is not None:
+                http_cache.save()
+
+        # Always scan local project files
+        project_root = os.path.join(os.path.dirname(__file__), args.project_dir)
+        if os.path.isdir(project_root):
+            print(f"\n📁 Scanning project files in: {project_root}")
+            manifest_path = os.path.join(os.path.dirname(__file__), args.manifest) if args.manifest else None
+            project_files = scrape_project_files(project_root, manifest_path=manifest_path, workers=args.workers)
+            cache = None
+            if args.metadata_cache:
+                cache = MetadataCache(os.path.join(os.path.dirname(__file__), args.metadata_cache))
+            metadata = extract_aspire_metadata(project_files, cache, workers=args.workers)
+            if cache is not None:
+                cache.save()
+            if run is not None:
+                run.add_files(project_files)
+                run.add_metadata(metadata)
+            if search_index is not None:
+                search_index.update_files(project_files)
+            writer.write({
+                "type": "project_scan",
+                "root": args.project_dir,
+                "file_count": len(project_files),
+                "metadata": metadata,
+                "timestamp": datetime.now().isoformat(),
+            })
+            if args.chunk:
+                for record in iter_file_chunks(project_files, args.chunk):
+                    writer.write(record)
+            print(f"🏗️  Found {len(metadata['services'])} services, {len(metadata['resources'])} resources, {len(metadata['endpoints'])} endpoints")
+
+    print(f"💾 Saved {writer.count} scrape results to {output_path}")
+    if run is not None:
+        print(f"🗃️  Recorded run #{run.run_id} in {args.store}")
+    if search_index is not None:
+        print(f"🔎 Search index: {search_index.indexed} indexed, {search_index.skipped} unchanged, "
+              f"{search_index.removed} removed")
 
     return 0
 
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Full-text search over scanned project files and scraped pages.
+
+Documents are tokenized into an inverted index (term → documents, with
+term frequency and the offset of the first occurrence) kept in SQLite, and
+queries are ranked with Okapi BM25. Context lookups for the review agent
+are then a handful of indexed reads instead of a scan through
+scrape-results.json.
+
+Re-indexing is incremental: a document is only re-tokenized when its
+fingerprint (content hash, or size and mtime for lazily scanned files)
+changes, and files that disappeared from the project are dropped.
+"""
+
+import re
+import os
+import sys
+import math
+import heapq
+import sqlite3
+import hashlib
+from collections import Counter
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id          INTEGER PRIMARY KEY,
+    source      TEXT NOT NULL UNIQUE,
+    kind        TEXT NOT NULL,
+    fingerprint TEXT,
+    length      INTEGER NOT NULL,
+    title       TEXT,
+    text        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term        TEXT NOT NULL,
+    doc_id      INTEGER NOT NULL REFERENCES docs(id) ON DELETE CASCADE,
+    tf          INTEGER NOT NULL,
+    first       INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+CREATE INDEX IF NOT EXISTS docs_kind ON docs (kind);
+"""
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CHARS = 160
+
+# Words of two or more characters; identifiers are also split on case changes
+_TOKEN_RE = re.compile(r"\w{2,}")
+_WORD_PART_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def iter_tokens(text: str):
+    """
+    Yield ``(term, offset)`` pairs for ``text``.
+
+    Terms are lowercased words. Mixed-case identifiers also yield their parts
+    at their own offsets (``WithReference`` → ``withreference``, ``with``,
+    ``reference``), so code matches plain-English queries.
+    """
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group()
+        start = match.start()
+        yield word.lower(), start
+        if word.islower() or word.isupper() or word.isdigit():
+            continue
+        parts = list(_WORD_PART_RE.finditer(word))
+        if len(parts) < 2:
+            continue
+        for part in parts:
+            if len(part.group()) > 1:
+                yield part.group().lower(), start + part.start()
+
+
+def query_terms(query: str) -> list:
+    """Distinct terms of a query, in order of appearance."""
+    return list(dict.fromkeys(term for term, _ in iter_tokens(query)))
+
+
+def _fingerprint(file) -> str:
+    """Change marker for a scanned file: its content hash when known, else size and mtime."""
+    sha256 = file.get("sha256")
+    if sha256:
+        return sha256
+    if file.get("mtime_ns") is not None:
+        return f"{file['size']}:{file['mtime_ns']}"
+    return hashlib.sha256(file["content"].encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    """
+    Persistent BM25 index of project files and scraped pages.
+
+    Document sources are relative file paths or page URLs. Offsets returned
+    by ``search`` are character offsets into the indexed text (the decoded
+    file content, or the page's extracted ``text``).
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._stats = None
+        self.indexed = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _current(self, source: str, fingerprint: str) -> bool:
+        row = self.conn.execute("SELECT fingerprint FROM docs WHERE source = ?", (source,)).fetchone()
+        return row is not None and row["fingerprint"] == fingerprint
+
+    def _put(self, source: str, kind: str, fingerprint: str, text: str, title: str = None) -> None:
+        """Replace one document and its postings (inside the caller's transaction)."""
+        counts = Counter()
+        first = {}
+        for term, offset in iter_tokens(text):
+            counts[term] += 1
+            first.setdefault(term, offset)
+        self.conn.execute("DELETE FROM docs WHERE source = ?", (source,))
+        cursor = self.conn.execute(
+            "INSERT INTO docs (source, kind, fingerprint, length, title, text) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, kind, fingerprint, sum(counts.values()), title, text),
+        )
+        doc_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?)",
+            ((term, doc_id, tf, first[term]) for term, tf in counts.items()),
+        )
+        self._stats = None
+        self.indexed += 1
+
+    def update_files(self, files) -> None:
+        """
+        Bring the indexed project files in line with a scan, in one transaction.
+
+        Args:
+            files: ``ProjectFile`` records or scan dicts (``scrape_project_files`` /
+                ``scan_project_changes`` schema). Files whose fingerprint is
+                unchanged are not read; indexed files missing from ``files``
+                are removed.
+        """
+        seen = set()
+        with self.conn:
+            for file in files:
+                source = file["path"]
+                seen.add(source)
+                fingerprint = _fingerprint(file)
+                if self._current(source, fingerprint):
+                    self.skipped += 1
+                    continue
+                try:
+                    text = file["content"]
+                except OSError as e:
+                    print(f"⚠️  Could not index {source}: {e}")
+                    continue
+                self._put(source, "file", fingerprint, text)
+            stale = [row["source"] for row in self.conn.execute("SELECT source FROM docs WHERE kind = 'file'")
+                     if row["source"] not in seen]
+            self.conn.executemany("DELETE FROM docs WHERE source = ?", ((source,) for source in stale))
+            if stale:
+                self._stats = None
+            self.removed += len(stale)
+
+    def add_page(self, result: dict) -> None:
+        """
+        Index one ``scrape_url`` result; call ``commit()`` after a batch.
+
+        Results without inline text (errors, ``duplicate_of`` stubs, blob
+        references) are ignored. A page whose text is unchanged is skipped.
+        """
+        text = result.get("text")
+        if "url" not in result or not isinstance(text, str) or not text:
+            return
+        fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if self._current(result["url"], fingerprint):
+            self.skipped += 1
+            return
+        self._put(result["url"], "page", fingerprint, text, result.get("title") or None)
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def stats(self) -> tuple:
+        """(document count, average document length in terms), cached until the index changes."""
+        if self._stats is None:
+            row = self.conn.execute("SELECT count(*), avg(length) FROM docs").fetchone()
+            self._stats = (row[0], row[1] or 0.0)
+        return self._stats
+
+    def search(self, query: str, limit: int = 10, kind: str = None) -> list:
+        """
+        Rank documents for ``query`` with BM25.
+
+        Args:
+            query: Free text; every term contributes (OR semantics).
+            limit: Maximum number of hits.
+            kind: Restrict to ``"file"`` or ``"page"`` documents.
+
+        Returns:
+            A list of dicts with keys: source, kind, title, score, offset
+            (of the earliest matching term) and snippet, best first.
+        """
+        total, avg_length = self.stats()
+        if not total:
+            return []
+        scores = Counter()
+        offsets = {}
+        for term in query_terms(query):
+            rows = self.conn.execute(
+                "SELECT p.doc_id, p.tf, p.first, d.length, d.kind FROM postings p JOIN docs d ON d.id = p.doc_id "
+                "WHERE p.term = ?",
+                (term,),
+            ).fetchall()
+            if not rows:
+                continue
+            idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+            for doc_id, tf, first, length, doc_kind in rows:
+                if kind and doc_kind != kind:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length) if avg_length else BM25_K1
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                offsets[doc_id] = min(first, offsets.get(doc_id, first))
+
+        hits = []
+        for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            offset = offsets[doc_id]
+            start = max(0, offset - SNIPPET_CHARS // 3)
+            row = self.conn.execute(
+                "SELECT source, kind, title, substr(text, ?, ?) AS window, length(text) AS size FROM docs WHERE id = ?",
+                (start + 1, SNIPPET_CHARS, doc_id),
+            ).fetchone()
+            snippet = _WHITESPACE_RE.sub(" ", row["window"]).strip()
+            if start > 0:
+                snippet = "…" + snippet
+            if start + SNIPPET_CHARS < row["size"]:
+                snippet += "…"
+            hits.append({
+                "source": row["source"],
+                "kind": row["kind"],
+                "title": row["title"],
+                "score": round(score, 4),
+                "offset": offset,
+                "snippet": snippet,
+            })
+        return hits
+
+
+def main():
+    """CLI: query a search index."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Search scraped project files and pages")
+    parser.add_argument("index", help="Path to the search index (e.g. docs/search-index.sqlite)")
+    parser.add_argument("query", nargs="+", help="Search terms")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of results (default: 10)")
+    parser.add_argument("--kind", choices=("file", "page"), help="Only return project files or scraped pages")
+    args = parser.parse_args()
+
+    with SearchIndex(args.index) as index:
+        started = time.perf_counter()
+        hits = index.search(" ".join(args.query), args.limit, args.kind)
+        elapsed = (time.perf_counter() - started) * 1000
+        for hit in hits:
+            print(f"{hit['score']:8.3f}  {hit['source']}:{hit['offset']}")
+            print(f"          {hit['snippet']}")
+        total, _ = index.stats()
+        print(f"🔎 {len(hits)} results from {total} documents in {elapsed:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
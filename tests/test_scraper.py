@@ -0,0 +1,351 @@
+"""Regression checks for scraper.py."""
+
+import os
+import sys
+import gzip
+import time
+import asyncio
+import builtins
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper
+from http_client import HTTPConnectionPool, HTTPCache, RobotsCache, RetryPolicy, CircuitBreaker
+from scraper import (
+    parse_apphost,
+    find_endpoints,
+    extract_html_text,
+    scan_project_changes,
+    scrape_url,
+    scrape_urls,
+    AsyncScraper,
+    sitemap_urls,
+)
+
+
+class ChainParsingTests(unittest.TestCase):
+    def test_comparison_is_not_generic_arguments(self):
+        metadata = parse_apphost(b"""
+var builder = DistributedApplication.CreateBuilder(args);
+var n = args.Length < 3 ? 1 : 2;
+var cache = builder.AddRedis("cache");
+var api = builder.AddProject<Projects.Api>("api").WithReference(cache);
+builder.Build().Run();
+""")
+        self.assertEqual([s["name"] for s in metadata["services"]], ["api"])
+        self.assertEqual([r["name"] for r in metadata["resources"]], ["cache"])
+        self.assertEqual(
+            [(d["from"], d["to"]) for d in metadata["dependencies"]],
+            [("api", "cache")],
+        )
+
+    def test_comparison_before_minimal_api_route(self):
+        endpoints = find_endpoints(b"""
+var app = builder.Build();
+if (args.Length < 2) { return; }
+app.MapGet("/a", () => "hi");
+""")
+        self.assertEqual(endpoints, [{"method": "Get", "path": "/a"}])
+
+    def test_map_calls_inside_lambda_arguments(self):
+        endpoints = find_endpoints(b"""
+app.UseEndpoints(endpoints =>
+{
+    endpoints.MapGet("/legacy", () => "old");
+    endpoints.MapHealthChecks("/healthz");
+});
+""")
+        self.assertEqual(endpoints, [
+            {"method": "Get", "path": "/legacy"},
+            {"method": "Get", "path": "/healthz"},
+        ])
+
+    def test_route_listed_with_http_attribute(self):
+        endpoints = find_endpoints(b"""
+[ApiController]
+[Route("api/[controller]")]
+public class ProductsController : ControllerBase
+{
+    [HttpPost, Route("bulk")]
+    public IActionResult Bulk() { return Ok(); }
+}
+""")
+        self.assertEqual(endpoints, [{"method": "Post", "path": "/api/Products/bulk"}])
+
+
+class HTMLTextTests(unittest.TestCase):
+    def test_comment_hides_markup_across_chunk_splits(self):
+        page = b"<p>a</p><!-- <script> --><p>b</p>"
+        for size in range(1, len(page) + 1):
+            chunks = [page[i:i + size] for i in range(0, len(page), size)]
+            self.assertEqual(extract_html_text(chunks)["text"], "a b")
+
+
+class IncrementalScanTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "src")
+        self.manifest = os.path.join(tmp.name, "state", ".scan-manifest.json")
+        os.makedirs(self.root)
+        for name in ("a.cs", "b.cs", "c.json"):
+            self.write(name, f"// {name}\n")
+
+    def write(self, name: str, text: str, mtime_ns: int = None):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def scan(self):
+        return scan_project_changes(self.root, self.manifest)
+
+    def test_first_scan_reports_every_file_as_added(self):
+        changes = self.scan()
+        self.assertEqual(changes["added"], ["a.cs", "b.cs", "c.json"])
+        self.assertEqual((changes["modified"], changes["deleted"], changes["unchanged"]), ([], [], 0))
+        self.assertTrue(all(file.sha256 for file in changes["files"]))
+
+    def test_unchanged_files_are_not_opened(self):
+        self.scan()
+        opened = []
+
+        def tracking_open(path, *args, **kwargs):
+            opened.append(str(path))
+            return builtins.open(path, *args, **kwargs)
+
+        with mock.patch.object(scraper, "open", tracking_open, create=True):
+            changes = self.scan()
+        self.assertEqual(changes["unchanged"], 3)
+        self.assertEqual((changes["added"], changes["modified"], changes["deleted"]), ([], [], []))
+        self.assertFalse([path for path in opened if path.startswith(self.root)])
+
+    def test_touched_but_identical_file_is_unchanged(self):
+        self.scan()
+        os.utime(os.path.join(self.root, "a.cs"), ns=(10**18, 10**18))
+        changes = self.scan()
+        self.assertEqual(changes["unchanged"], 3)
+        self.assertEqual(changes["modified"], [])
+        # The refreshed stat key is saved, so the next scan does not re-hash it
+        self.assertEqual(scraper.load_manifest(self.manifest)["files"]["a.cs"]["mtime_ns"], 10**18)
+
+    def test_edited_and_deleted_files(self):
+        self.scan()
+        self.write("b.cs", "// b.cs, edited\n", mtime_ns=10**18)
+        os.remove(os.path.join(self.root, "c.json"))
+        self.write("d.md", "# new\n")
+        changes = self.scan()
+        self.assertEqual(changes["added"], ["d.md"])
+        self.assertEqual(changes["modified"], ["b.cs"])
+        self.assertEqual(changes["deleted"], ["c.json"])
+        self.assertEqual(changes["unchanged"], 1)
+        self.assertEqual([file.path for file in changes["files"]], ["a.cs", "b.cs", "d.md"])
+        self.assertEqual(changes["files"][1]["content"], "// b.cs, edited\n")
+
+
+# ---------------------------------------------------------------------------
+# Remote scraping against a local stand-in server
+# ---------------------------------------------------------------------------
+
+def page(title: str) -> bytes:
+    return f"<html><head><title>{title}</title></head><body><p>{title} body</p></body></html>".encode()
+
+
+class Concurrency:
+    """Counts requests in flight and remembers the peak; may be shared by several servers."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.active -= 1
+
+
+class StandInServer:
+    """
+    Keep-alive HTTP server on 127.0.0.1 answering from ``routes``.
+
+    A route maps a path to ``(status, headers, body)`` or to a callable taking
+    the request headers and returning one. Unknown paths (robots.txt included)
+    get a 404. Every request is logged as ``(path, headers)``.
+    """
+
+    def __init__(self, routes: dict, shared: Concurrency = None):
+        self.routes = routes
+        self.requests = []
+        self.concurrency = Concurrency()
+        self.shared = shared or Concurrency()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append((self.path, self.headers))
+                with server.concurrency, server.shared:
+                    route = server.routes.get(self.path, (404, {}, b"not found"))
+                    status, headers, body = route(self.headers) if callable(route) else route
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def paths(self) -> list:
+        return [path for path, _ in self.requests]
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def slow(title: str, delay: float):
+    def respond(headers):
+        time.sleep(delay)
+        return 200, {"Content-Type": "text/html"}, page(title)
+    return respond
+
+
+class RemoteScrapingTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = HTTPConnectionPool()
+        self.addCleanup(self.pool.close)
+
+    def serve(self, routes: dict, shared: Concurrency = None) -> StandInServer:
+        server = StandInServer(routes, shared)
+        self.addCleanup(server.close)
+        return server
+
+    def test_results_keep_input_order_under_global_limit(self):
+        delays = {"/a": 0.3, "/b": 0.2, "/c": 0.1, "/d": 0.0}
+        server = self.serve({path: slow(path[1:], delay) for path, delay in delays.items()})
+        urls = [server.url(path) for path in delays]
+        results = scrape_urls(urls, concurrency=2, per_host=4, respect_robots=False, pool=self.pool)
+        self.assertEqual([r["url"] for r in results], urls)
+        self.assertEqual([r["title"] for r in results], ["a", "b", "c", "d"])
+        self.assertEqual(server.concurrency.peak, 2)
+
+    def test_per_host_limit(self):
+        shared = Concurrency()
+        servers = [self.serve({f"/{n}": slow(str(n), 0.1) for n in range(3)}, shared) for _ in range(2)]
+        urls = [server.url(f"/{n}") for n in range(3) for server in servers]
+        results = scrape_urls(urls, concurrency=8, per_host=1, respect_robots=False, pool=self.pool)
+        self.assertFalse([r for r in results if r.get("error")])
+        self.assertEqual([server.concurrency.peak for server in servers], [1, 1])
+        self.assertEqual(shared.peak, 2)
+
+    def test_robots_disallow(self):
+        server = self.serve({
+            "/robots.txt": (200, {"Content-Type": "text/plain"}, b"User-agent: *\nDisallow: /private/\n"),
+            "/public": (200, {}, page("public")),
+            "/private/page": (200, {}, page("private")),
+        })
+        engine = AsyncScraper(robots=RobotsCache(pool=self.pool), pool=self.pool)
+        results = asyncio.run(engine.scrape_all([server.url("/public"), server.url("/private/page")]))
+        self.assertEqual(results[0]["title"], "public")
+        self.assertIn("robots.txt", results[1]["error"])
+        self.assertEqual(server.paths().count("/robots.txt"), 1)
+        self.assertNotIn("/private/page", server.paths())
+
+    def test_not_modified_reuses_cached_body(self):
+        def respond(headers):
+            if headers.get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"ETag": '"v1"', "Content-Type": "text/html"}, page("cached")
+        server = self.serve({"/doc": respond})
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        cache = HTTPCache(tmp.name)
+        first = scrape_url(server.url("/doc"), respect_robots=False, http_cache=cache, pool=self.pool)
+        cache.save()
+        cache = HTTPCache(tmp.name)
+        second = scrape_url(server.url("/doc"), respect_robots=False, http_cache=cache, pool=self.pool)
+        self.assertEqual(second["text"], first["text"])
+        self.assertEqual((cache.misses, cache.revalidated), (0, 1))
+        self.assertEqual(server.requests[-1][1].get("If-None-Match"), '"v1"')
+
+    def test_retry_after_is_honoured(self):
+        answers = [(503, {"Retry-After": "1"}, b"busy"), (200, {}, page("back"))]
+        server = self.serve({"/busy": lambda headers: answers.pop(0)})
+        started = time.monotonic()
+        result = scrape_url(server.url("/busy"), respect_robots=False, pool=self.pool,
+                            retry=RetryPolicy(attempts=3, max_delay=5), breaker=CircuitBreaker())
+        self.assertEqual(result["title"], "back")
+        self.assertGreaterEqual(time.monotonic() - started, 1.0)
+        self.assertEqual(server.paths(), ["/busy", "/busy"])
+
+    def test_circuit_breaker_open_half_open_closed(self):
+        status = {"code": 500}
+        server = self.serve({"/flaky": lambda headers: (status["code"], {}, page("flaky"))})
+        url = server.url("/flaky")
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+
+        def scrape():
+            return scrape_url(url, respect_robots=False, pool=self.pool, retry=RetryPolicy(attempts=1), breaker=breaker)
+
+        scrape()
+        self.assertFalse(breaker.is_open(url))
+        scrape()
+        self.assertTrue(breaker.is_open(url))
+        # Open: failing fast, without a request
+        self.assertIn("Circuit open", scrape()["error"])
+        self.assertEqual(len(server.requests), 2)
+
+        # Half-open: one trial request; its failure re-opens the circuit at once
+        time.sleep(0.25)
+        scrape()
+        self.assertEqual(len(server.requests), 3)
+        self.assertTrue(breaker.is_open(url))
+
+        # Half-open again: a successful trial closes it
+        status["code"] = 200
+        time.sleep(0.25)
+        self.assertEqual(scrape()["title"], "flaky")
+        self.assertFalse(breaker.is_open(url))
+
+    def test_gzip_sitemap_with_lastmod_filter(self):
+        server = self.serve({})
+        entries = [("/old", "2025-01-01"), ("/new", "2026-06-01T12:00:00+00:00"), ("/undated", None)]
+        xml = "".join(
+            f"<url><loc>{server.url(path)}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>"
+            for path, lastmod in entries
+        )
+        body = gzip.compress(
+            f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{xml}</urlset>'.encode()
+        )
+        server.routes["/sitemap.xml.gz"] = (200, {"Content-Type": "application/gzip"}, body)
+        since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        urls = list(sitemap_urls([server.url("/sitemap.xml.gz")], since, pool=self.pool))
+        self.assertEqual(urls, [server.url("/new"), server.url("/undated")])
+
+
+if __name__ == "__main__":
+    unittest.main()